@@ -2,19 +2,23 @@
 #  DataON 데이터 정제 스크립트
 # ------------------------------------------------
 # 역할:
-# - dataon_dumps 폴더 내 datasets_part*.jsonl 파일들을 모두 병합
+# - dataon_dumps 폴더 내 datasets_part*.jsonl[.zst] 파일들을 모두 병합
 # - HTML 엔티티 및 공백 제거
 # - title/description 없는 항목 제외
 # - 언어 감지(langdetect) 추가
-# - 최종적으로 dataon_clean.jsonl에 저장
+# - 최종적으로 dataon_clean.jsonl.zst (zstd 프레임 + id 인덱스) 에 저장
+# - 파트 해제·정제·언어 감지는 jsonl_store.iter_records 로 여러 프로세스에서 병렬 처리
 # ================================================================
 
-import orjson
-import glob
+import os
 import re
+import sys
 from tqdm import tqdm
 from langdetect import detect, DetectorFactory
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "Preprocessing"))
+from jsonl_store import PartWriter, expand, index_path, iter_records
+
 # ================================================================
 # 언어 감지 초기 설정
 # ------------------------------------------------
@@ -26,10 +30,13 @@ DetectorFactory.seed = 0
 # ------------------------------------------------
 # 입력 / 출력 파일 설정
 # ------------------------------------------------
-# dataon_dumps 폴더 내에 있는 datasets_part1.jsonl, datasets_part2.jsonl … 파일들을 모두 읽음
-INPUT_FILES = sorted(glob.glob("dataon_dumps/datasets_part*.jsonl"))
-# 정제된 통합 파일 출력 경로
-OUTPUT_FILE = "dataon_clean.jsonl"
+# dataon_dumps 폴더 내에 있는 datasets_part1.jsonl.zst, datasets_part2.jsonl.zst … 파일들을 모두 읽음
+# (이전 평문 datasets_part*.jsonl 도 그대로 읽음)
+INPUT_FILES = expand("dataon_dumps/datasets_part*.jsonl")
+# 정제된 통합 파일 출력 경로 (+ dataon_clean.jsonl.zst.idx)
+OUTPUT_FILE = "dataon_clean.jsonl.zst"
+# 병렬 워커 수 (langdetect 가 병목이라 코어 수만큼)
+WORKERS = int(os.getenv("PREPROCESS_WORKERS", os.cpu_count() or 1))
 
 
 # ================================================================
@@ -47,73 +54,79 @@ def clean_text(text):
     return text.strip()                    # 앞뒤 공백 제거 후 반환
 
 
+# ================================================================
+# clean_record()
+# ------------------------------------------------
+# 레코드 하나 정제 (워커 프로세스에서 실행)
+# - 제외 대상이면 None 반환
+# ================================================================
+def clean_record(obj):
+    try:
+        # ------------------------------------------------
+        # 1️⃣ 텍스트 정제
+        # ------------------------------------------------
+        title = clean_text(obj.get("title", ""))
+        desc = clean_text(obj.get("description", ""))
+        url = obj.get("url", "")
+
+        # title/description이 비어 있으면 제외
+        if not title or not desc:
+            return None
+
+        # ------------------------------------------------
+        # 2️⃣ 언어 감지
+        # ------------------------------------------------
+        try:
+            # title + description을 결합해 감지 정확도 향상
+            lang = detect(title + " " + desc)
+        except Exception:
+            lang = "unknown"
+
+        # ------------------------------------------------
+        # 3️⃣ 정제된 레코드 구성
+        # ------------------------------------------------
+        return {
+            "id": obj.get("id"),
+            "title": title,
+            "description": desc,
+            "keywords": obj.get("keywords", []),
+            "org": obj.get("org", ""),
+            "year": obj.get("year", ""),
+            "url": url,
+            "doi": obj.get("doi", ""),
+            "lang": lang  # 감지된 언어 저장 (예: 'ko', 'en', 'ja' 등)
+        }
+    except Exception:
+        # 필드 타입 오류 등은 건너뜀
+        return None
+
+
 # ================================================================
 # main()
 # ------------------------------------------------
 # 메인 처리 파이프라인
-# 1️⃣ 각 datasets_part*.jsonl 파일 순회
-# 2️⃣ JSON 파싱 후 필드 정제
-# 3️⃣ 언어 감지(langdetect)
-# 4️⃣ dataon_clean.jsonl로 저장
+# 1️⃣ datasets_part* 파트들을 프레임 묶음 단위로 병렬 해제·파싱
+# 2️⃣ 워커에서 필드 정제 + 언어 감지(clean_record)
+# 3️⃣ 입력 순서대로 받아 dataon_clean.jsonl.zst 로 저장
 # ================================================================
 def main():
     total_in, total_out = 0, 0  # 전체 입력/출력 카운트
-
-    # 출력 파일 열기 (wb: 바이너리 모드로 한 줄씩 쓰기)
-    with open(OUTPUT_FILE, "wb") as out_f:
-        # dataon_dumps의 모든 파트 파일 순회
-        for file in INPUT_FILES:
-            print(f"[INFO] 처리 중: {file}")
-
-            # tqdm으로 진행률 표시
-            with open(file, "rb") as f:
-                for line in tqdm(f, desc=f"{file}"):
-                    total_in += 1
-                    try:
-                        obj = orjson.loads(line)  # JSON 파싱
-                        # ------------------------------------------------
-                        # 1️⃣ 텍스트 정제
-                        # ------------------------------------------------
-                        title = clean_text(obj.get("title", ""))
-                        desc = clean_text(obj.get("description", ""))
-                        url = obj.get("url", "")
-
-                        # title/description이 비어 있으면 제외
-                        if not title or not desc:
-                            continue
-
-                        # ------------------------------------------------
-                        # 2️⃣ 언어 감지
-                        # ------------------------------------------------
-                        try:
-                            # title + description을 결합해 감지 정확도 향상
-                            lang = detect(title + " " + desc)
-                        except Exception:
-                            lang = "unknown"
-
-                        # ------------------------------------------------
-                        # 3️⃣ 정제된 레코드 구성
-                        # ------------------------------------------------
-                        record = {
-                            "id": obj.get("id"),
-                            "title": title,
-                            "description": desc,
-                            "keywords": obj.get("keywords", []),
-                            "org": obj.get("org", ""),
-                            "year": obj.get("year", ""),
-                            "url": url,
-                            "doi": obj.get("doi", ""),
-                            "lang": lang  # 감지된 언어 저장 (예: 'ko', 'en', 'ja' 등)
-                        }
-
-                        # ------------------------------------------------
-                        # 4️⃣ JSONL로 한 줄씩 저장
-                        # ------------------------------------------------
-                        out_f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
-                        total_out += 1
-                    except Exception:
-                        # JSON 파싱 오류나 필드 누락 등은 건너뜀
-                        continue
+    print(f"[INFO] 처리 대상: {len(INPUT_FILES)}개 파트, 워커 {WORKERS}개")
+
+    # 기존 출력은 덮어씀 (PartWriter 는 append 이므로 먼저 삭제)
+    for path in (OUTPUT_FILE, index_path(OUTPUT_FILE)):
+        if os.path.exists(path):
+            os.remove(path)
+
+    with PartWriter(OUTPUT_FILE) as writer:
+        for record in tqdm(iter_records(INPUT_FILES, workers=WORKERS, fn=clean_record), desc="정제"):
+            total_in += 1
+            # ------------------------------------------------
+            # 4️⃣ 프레임 단위로 압축 저장
+            # ------------------------------------------------
+            if record is not None:
+                writer.write([record])
+                total_out += 1
 
     # ================================================================
     # 처리 완료 로그
@@ -1,26 +1,47 @@
 """
 BM25 인덱스 및 SBERT 임베딩을 미리 계산해 cache/ 에 저장.
+(임베딩은 get_backend() → BACKEND=onnx 면 ONNX, 서빙 시 질의 임베딩과 같은 백엔드)
++ Clarify 라우터용 코퍼스 어휘(cache/vocab.txt, 논문+데이터셋 BM25 토큰 합집합)
++ 검색창 자동완성 인덱스(cache/suggest.bin, 논문+데이터셋 title/keywords)
 """
 import os, pickle, json, numpy as np, pandas as pd
 from pathlib import Path
-from pipeline import load_df, compose_dense_text, WeightedBM25, FIELD_WEIGHTS, SBERTBackend  # ← 노트북 함수 복사해 둔 모듈
+from pipeline import load_df, compose_dense_text, WeightedBM25, FIELD_WEIGHTS, get_backend  # ← 노트북 함수 복사해 둔 모듈
+from pipeline import _corpus_fingerprint, _backend_tag
+from suggest import build_suggest_index
 
 CACHE = Path("cache"); CACHE.mkdir(exist_ok=True)
 
-def build(name: str, csv_path: str, sbert_path: str):
+def build(name: str, csv_path: str, backend):
     df = load_df(csv_path)
     bm25 = WeightedBM25(df, FIELD_WEIGHTS)
     texts = [compose_dense_text(r) for _, r in df.iterrows()]
-    sbert = SBERTBackend(sbert_path)
-    vecs = sbert.encode(texts)
+    vecs = backend.encode(texts)
 
     with open(CACHE/f"{name}.bm25.pkl","wb") as f: pickle.dump(bm25, f)
     np.save(CACHE/f"{name}.dense.npy", vecs)
     json.dump(texts, open(CACHE/f"{name}.texts.json","w",encoding="utf-8"), ensure_ascii=False)
+    # RetrievalIndex.load 가 현재 코퍼스 / 임베딩 백엔드와 같은지 확인하는 지문 (다르면 캐시 대신 새로 구축)
+    json.dump({"rows": len(df), "fingerprint": _corpus_fingerprint(df), "backend": _backend_tag(backend)},
+              open(CACHE/f"{name}.meta.json","w",encoding="utf-8"))
 
-    print(f"[OK] {name} cached: {len(df)} rows")
+    print(f"[OK] {name} cached: {len(df)} rows ({_backend_tag(backend)})")
+    return bm25, df
+
+def save_vocab(*bm25s: WeightedBM25):
+    vocab = sorted({t for bm25 in bm25s for fb, _ in bm25.fields.values() for t in fb.vocab})
+    with open(CACHE/"vocab.txt","w",encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+    print(f"[OK] vocab cached: {len(vocab)} terms")
+
+def save_suggest(papers: pd.DataFrame, datasets: pd.DataFrame):
+    n = build_suggest_index([("paper", papers), ("dataset", datasets)], CACHE/"suggest.bin")
+    print(f"[OK] suggest index cached: {n} entries ({(CACHE/'suggest.bin').stat().st_size / 1e6:.1f} MB)")
 
 if __name__ == "__main__":
-    SBERT = os.getenv("SBERT_ID","models/paraphrase-multilingual-MiniLM-L12-v2")
-    build("papers",   "papers_clean.prep.csv",   SBERT)
-    build("datasets", "datasets_clean_prep.csv", SBERT)
+    # 서빙과 같은 백엔드(BACKEND=torch|onnx, SBERT_ID)로 임베딩 → 질의 임베딩과 같은 공간
+    backend = get_backend()
+    bm25_p, papers   = build("papers",   "papers_clean.prep.csv",   backend)
+    bm25_d, datasets = build("datasets", "datasets_clean_prep.csv", backend)
+    save_vocab(bm25_p, bm25_d)
+    save_suggest(papers, datasets)
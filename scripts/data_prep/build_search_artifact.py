@@ -0,0 +1,146 @@
+"""
+supabase recommend-papers 엣지 함수용 검색 아티팩트를 미리 계산해 저장.
+
+- papers_clean.jsonl(또는 csv)로 WeightedBM25 를 만든 뒤, 필드 가중합까지 반영한
+  (term, doc) 별 BM25 기여도(impact)를 term 단위 스케일 + uint8 로 양자화
+  → 질의 점수 = Σ_term impact ≈ WeightedBM25.score (순위 동일성은 check_search_artifact.py 로 확인)
+- term 은 fnv1a(term) % n_shards 로 샤드에 배정 → 엣지 함수는 질의 term 이 속한 샤드만 받아 캐시
+- 문서 메타데이터(title, description 앞부분, url)는 docs.json.gz 한 파일
+
+출력 (out_dir):
+  manifest.json        버전/문서 수/샤드 수/토크나이저/파일 목록
+  docs.json.gz         [[title, description, url], ...]  (doc id = 배열 인덱스)
+  shard_XXX.bin.gz     little-endian 바이너리
+      magic "RGS1" | u32 n_terms | u32 n_postings
+      u32 term_off[n_terms+1] | term utf-8 bytes
+      u32 post_off[n_terms+1] | f32 scale[n_terms]
+      u32 doc_ids[n_postings] | u8 impacts[n_postings]
+  (term 은 utf-8 바이트 기준 정렬, term 별 doc_ids 오름차순, impact * scale = 기여도)
+
+실행:
+  PYTHONPATH=src/Modeling python scripts/data_prep/build_search_artifact.py \
+      --input data/cleaned/papers_clean.jsonl --out cache/search_artifact
+  → out 디렉토리 내용을 storage 버킷 papers/search/ 에 업로드
+"""
+import argparse, gzip, hashlib, json, os, struct, time
+from pathlib import Path
+import numpy as np, pandas as pd
+import orjson
+from pipeline import load_df, safe_text, WeightedBM25, FIELD_WEIGHTS
+
+MAGIC = b"RGS1"
+DESC_CHARS = 200   # 엣지 함수 응답에 쓰는 설명 길이
+TOKEN_PATTERN = "[가-힣A-Za-z0-9]+"   # pipeline.lite_tokens 와 동일 (소문자화, 길이 2 이상)
+
+def fnv1a(s: str) -> int:
+    h = 0x811C9DC5
+    for b in s.encode("utf-8"):
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+def load_papers(path: str) -> pd.DataFrame:
+    if path.endswith(".csv"):
+        return load_df(path)
+    rows = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                rows.append(orjson.loads(line))
+            except Exception:
+                continue
+    df = pd.DataFrame(rows)
+    for col in ["title", "description", "url"]:
+        if col not in df.columns:
+            df[col] = ""
+    return df
+
+def term_impacts(bm25: WeightedBM25):
+    """필드별 posting 을 합쳐 (terms, indptr, doc_ids, impacts[float64]) — term 정렬, doc 오름차순"""
+    terms = sorted({t for fb, _ in bm25.fields.values() for t in fb.vocab},
+                   key=lambda t: t.encode("utf-8"))
+    gid = {t: i for i, t in enumerate(terms)}
+    n = max(1, bm25.n_docs)
+
+    keys, vals = [], []
+    for fb, w in bm25.fields.values():
+        local2g = np.fromiter((gid[t] for t in fb.vocab), dtype=np.int64, count=len(fb.vocab))
+        tid = np.repeat(local2g, np.diff(fb.indptr))
+        ids = fb.doc_ids.astype(np.int64)
+        contrib = fb.idf[np.repeat(np.arange(len(fb.vocab)), np.diff(fb.indptr))] \
+            * (fb.tfs * (fb.k1 + 1) / (fb.tfs + fb.norm[ids]))
+        keys.append(tid * n + ids); vals.append(w * contrib)
+
+    keys = np.concatenate(keys) if keys else np.empty(0, np.int64)
+    vals = np.concatenate(vals) if vals else np.empty(0)
+    uniq, inv = np.unique(keys, return_inverse=True)
+    impacts = np.bincount(inv, weights=vals, minlength=len(uniq))
+    tid, doc = uniq // n, uniq % n
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(tid, minlength=len(terms)))
+    return terms, indptr, doc.astype(np.uint32), impacts
+
+def quantize(indptr, impacts):
+    """term 별 최댓값 / 255 를 스케일로 uint8 양자화 (0 이하 기여도는 0 → 무시)"""
+    n_terms = len(indptr) - 1
+    scale = np.zeros(n_terms, dtype=np.float32)
+    nz = np.diff(indptr) > 0
+    scale[nz] = np.maximum.reduceat(impacts, indptr[:-1][nz]) / 255.0
+    s = np.repeat(scale, np.diff(indptr)).astype(np.float64)
+    q = np.where(s > 0, np.rint(impacts / np.where(s > 0, s, 1)), 0)
+    q = np.where((impacts > 0) & (q < 1), 1, q)
+    return scale, np.clip(q, 0, 255).astype(np.uint8)
+
+def write_shard(path: Path, terms, indptr, doc_ids, qimp, scale, sel):
+    tb = [terms[i].encode("utf-8") for i in sel]
+    term_off = np.zeros(len(sel) + 1, dtype="<u4"); term_off[1:] = np.cumsum([len(b) for b in tb])
+    lens = np.array([indptr[i + 1] - indptr[i] for i in sel], dtype=np.int64)
+    post_off = np.zeros(len(sel) + 1, dtype="<u4"); post_off[1:] = np.cumsum(lens)
+    idx = np.concatenate([np.arange(indptr[i], indptr[i + 1]) for i in sel]) if len(sel) else np.empty(0, np.int64)
+
+    with gzip.open(path, "wb", compresslevel=9) as f:
+        f.write(MAGIC + struct.pack("<II", len(sel), int(post_off[-1])))
+        f.write(term_off.tobytes()); f.write(b"".join(tb))
+        f.write(post_off.tobytes()); f.write(scale[sel].astype("<f4").tobytes())
+        f.write(doc_ids[idx].astype("<u4").tobytes()); f.write(qimp[idx].tobytes())
+
+def build(input_path: str, out_dir: str, n_shards: int):
+    t0 = time.perf_counter()
+    out = Path(out_dir); out.mkdir(parents=True, exist_ok=True)
+    df = load_papers(input_path)
+    bm25 = WeightedBM25(df, FIELD_WEIGHTS)
+    terms, indptr, doc_ids, impacts = term_impacts(bm25)
+    scale, qimp = quantize(indptr, impacts)
+
+    shard_of = np.array([fnv1a(t) % n_shards for t in terms], dtype=np.int64)
+    shards = []
+    for s in range(n_shards):
+        name = f"shard_{s:03d}.bin.gz"
+        write_shard(out / name, terms, indptr, doc_ids, qimp, scale, np.flatnonzero(shard_of == s))
+        shards.append(name)
+
+    docs = [[safe_text(r.title), safe_text(r.description)[:DESC_CHARS], safe_text(r.url)]
+            for r in df[["title", "description", "url"]].itertuples(index=False)]
+    with gzip.open(out / "docs.json.gz", "wb", compresslevel=9) as f:
+        f.write(orjson.dumps(docs))
+
+    version = hashlib.sha1(b"".join((out / n).read_bytes() for n in shards + ["docs.json.gz"])).hexdigest()[:16]
+    manifest = {
+        "format": MAGIC.decode(), "version": version, "n_docs": int(bm25.n_docs),
+        "n_terms": len(terms), "n_postings": int(len(doc_ids)), "n_shards": n_shards,
+        "hash": "fnv1a32", "tokenizer": {"pattern": TOKEN_PATTERN, "lower": True, "min_len": 2},
+        "fields": {f: w for f, (_, w) in bm25.fields.items()},
+        "docs": "docs.json.gz", "shards": shards,
+    }
+    json.dump(manifest, open(out / "manifest.json", "w", encoding="utf-8"), ensure_ascii=False, indent=2)
+
+    size = sum(p.stat().st_size for p in out.iterdir())
+    print(f"[OK] search artifact: {bm25.n_docs} docs, {len(terms)} terms, {len(doc_ids)} postings "
+          f"→ {out} ({size / 1e6:.1f} MB, {time.perf_counter() - t0:.1f}s)")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=os.path.join("data", "cleaned", "papers_clean.jsonl"))
+    ap.add_argument("--out", default=os.path.join("cache", "search_artifact"))
+    ap.add_argument("--shards", type=int, default=16)
+    args = ap.parse_args()
+    build(args.input, args.out, args.shards)
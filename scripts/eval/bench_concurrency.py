@@ -0,0 +1,71 @@
+"""
+동시성 스트레스 테스트: 스레드 수(1 → 코어 수)별 처리량(QPS)과 스케일링 효율 측정.
+- 콜드 상태에서 여러 스레드가 동시에 인덱스를 요청해도 1회만 구축되는지 확인
+- 모든 스레드 결과가 단일 스레드 결과와 동일한지 확인
+- 응답 캐시는 끄고 측정 (매 요청 전체 파이프라인 실행)
+"""
+import argparse, os, time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pipeline
+from pipeline import load_df, get_backend, Pipeline, RetrievalIndex
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--queries",  default="queries.csv", help="title,desc 컬럼 (없으면 코퍼스 제목 샘플)")
+    ap.add_argument("--n",        type=int, default=64, help="스레드 수별 요청 수")
+    ap.add_argument("--max-threads", type=int, default=os.cpu_count())
+    ap.add_argument("--no-ce", action="store_true")
+    args = ap.parse_args()
+
+    pipeline.USE_RESPONSE_CACHE = False
+    if args.no_ce:
+        pipeline.USE_CE = False
+
+    backend  = get_backend()
+    papers   = load_df(args.papers)
+    datasets = load_df(args.datasets)
+    if os.path.exists(args.queries):
+        qdf = pd.read_csv(args.queries).fillna("")
+        queries = list(zip(qdf["title"], qdf.get("desc", [""] * len(qdf))))
+    else:
+        sample = papers.sample(min(args.n, len(papers)), random_state=42)
+        queries = [(t, "") for t in sample["title"].fillna("").astype(str)]
+    queries = (queries * (args.n // max(1, len(queries)) + 1))[:args.n]
+
+    # 1) 콜드 동시 초기화: 구축 횟수 카운트
+    builds = 0
+    build = RetrievalIndex.build.__func__
+    def counted_build(cls, *a, **kw):
+        nonlocal builds
+        builds += 1
+        return build(cls, *a, **kw)
+    RetrievalIndex.build = classmethod(counted_build)
+
+    pipe = Pipeline(papers, datasets, backend)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.max_threads) as ex:
+        list(ex.map(lambda _: pipe.index, range(args.max_threads * 2)))
+    print(f"[init] {args.max_threads} threads → index built {builds}x ({time.perf_counter()-t0:.1f}s)")
+
+    # 2) 정답(단일 스레드) + 워밍업
+    expected = [pipe.recommend(t, d) for t, d in queries]
+
+    # 3) 스레드 수별 처리량
+    levels = sorted({1, args.max_threads, *[2 ** i for i in range(1, 16) if 2 ** i <= args.max_threads]})
+    base_qps = None
+    for threads in levels:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(threads) as ex:
+            got = list(ex.map(lambda q: pipe.recommend(*q), queries))
+        dt = time.perf_counter() - t0
+        qps = len(queries) / dt
+        base_qps = base_qps or qps
+        same = all(g.equals(e) for g, e in zip(got, expected))
+        print(f"threads={threads:>3}  QPS={qps:8.2f}  speedup={qps/base_qps:5.2f}x  "
+              f"efficiency={qps/base_qps/threads:5.1%}  identical={same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Facet 필터 질의 지연: 필터 없음 vs 선택도별 필터 (연도 1년 / 기관 1곳 / 연도+언어+기관 / 넓은 연도 범위).
+- BM25 후보 단계(facet 선택 → 필드 BM25 → 가중합 → 상위 TOPN_BM25 정렬 → 문서 id) p50 / p95 (ms)
+- 전체 recommend() p50 (응답 캐시 끔, --no-ce 권장)
+- 필터 값은 코퍼스에서 자동 선택 (가장 흔한 기관, 가장 최근 연도, 가장 흔한 언어)
+- 필터 결과가 전체 점수의 부분집합과 같은지도 확인
+
+실행:
+  PYTHONPATH=src/Modeling python scripts/eval/bench_filters.py --no-ce
+"""
+import argparse, os, time
+import numpy as np
+import pandas as pd
+import pipeline
+from pipeline import load_df, get_backend, lite_tokens, normalize_filters, Pipeline, TOPN_BM25
+
+def pct(xs, q):
+    return float(np.percentile(np.asarray(xs) * 1000, q))
+
+def bm25_stage(index, tokens, filters):
+    docs = index.facets_d.select(filters)
+    b = index.bm25_d.combine(index.bm25_d.field_scores(tokens, docs=docs), docs)
+    top = np.argsort(-b, kind="stable")[:min(TOPN_BM25, len(b))]
+    return top if docs is None else docs.ids[top]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--queries",  default="queries.csv", help="title,desc 컬럼 (없으면 코퍼스 제목 샘플)")
+    ap.add_argument("--n",        type=int, default=50)
+    ap.add_argument("--no-ce", action="store_true")
+    args = ap.parse_args()
+
+    pipeline.USE_RESPONSE_CACHE = False
+    if args.no_ce:
+        pipeline.USE_CE = False
+
+    backend  = get_backend()
+    papers   = load_df(args.papers)
+    datasets = load_df(args.datasets)
+    if os.path.exists(args.queries):
+        qdf = pd.read_csv(args.queries).fillna("")
+        queries = [f"{t} {d}".strip() for t, d in zip(qdf["title"], qdf.get("desc", [""] * len(qdf)))][:args.n]
+    else:
+        sample = datasets.sample(min(args.n, len(datasets)), random_state=42)
+        queries = sample["title"].fillna("").astype(str).tolist()
+
+    pipe = Pipeline(papers, datasets, backend)
+    index = pipe.index
+    sets = index.facets_d.sets
+    common = lambda facet: max(sets[facet], key=lambda v: len(sets[facet][v])) if sets[facet] else None
+    years = sorted(sets["year"])
+    cases = {"none": None}
+    if years:
+        cases[f"year={years[-1]}"] = {"year_min": years[-1], "year_max": years[-1]}
+        cases[f"year>={years[len(years) // 4]}"] = {"year_min": years[len(years) // 4]}
+    if common("org") is not None:
+        cases[f"org={common('org')}"] = {"org": common("org")}
+    if years and common("org") is not None and common("lang") is not None:
+        cases["year+lang+org"] = {"year_min": years[-len(years) // 3], "lang": common("lang"), "org": common("org")}
+
+    pipe.recommend("warm up", "", topk=1)
+    print(f"[datasets={len(datasets):,}] queries={len(queries)}  TOPN_BM25={TOPN_BM25}")
+    print(f"  {'filter':<22} {'selected':>9} | {'bm25 p50':>9} {'p95':>8} | {'recommend p50':>13}")
+    for name, raw in cases.items():
+        filters = normalize_filters(raw)
+        docs = index.facets_d.select(filters)
+        n_sel = len(datasets) if docs is None else len(docs)
+        bm25_t, rec_t = [], []
+        for q in queries:
+            tokens = lite_tokens(q)
+            t0 = time.perf_counter()
+            bm25_stage(index, tokens, filters)
+            bm25_t.append(time.perf_counter() - t0)
+            if docs is not None:
+                full = index.bm25_d.combine(index.bm25_d.field_scores(tokens))
+                sub = index.bm25_d.combine(index.bm25_d.field_scores(tokens, docs=docs), docs)
+                assert np.array_equal(full[docs.ids], sub), f"필터 점수 불일치: {name} / {q!r}"
+        for q in queries[:max(1, len(queries) // 5)]:
+            t0 = time.perf_counter()
+            pipe.recommend(q, "", filters=raw)
+            rec_t.append(time.perf_counter() - t0)
+        print(f"  {name:<22} {n_sel:>9,} | {pct(bm25_t, 50):>8.2f}ms {pct(bm25_t, 95):>6.2f}ms | "
+              f"{pct(rec_t, 50):>11.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+평문 JSONL 파트 vs zstd 프레임 파트(jsonl_store) 비교.
+- 디스크 사용량: 평문 합계 / zst 합계 / 인덱스 합계
+- 전체 읽기 처리량: 평문 순차 파싱(현재 preprocess.py 방식) vs iter_records(워커 수별)
+- 중복 방지 id 로드: 평문 전체 파싱(기존 load_seen_ids) vs load_ids(인덱스만)
+- 두 형식에서 읽은 레코드 수 / id 집합이 같은지 확인
+
+실행:
+  PYTHONPATH=src/Preprocessing python scripts/eval/bench_jsonl_store.py \
+      --input "dataon_dumps/datasets_part*.jsonl" --workers 1 2 4 8
+"""
+import argparse, glob, os, shutil, tempfile, time
+import orjson
+import jsonl_store
+from jsonl_store import convert, index_path, iter_records, load_ids
+
+def plain_records(files):
+    for path in files:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield orjson.loads(line)
+                except Exception:
+                    continue
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input",   default=os.path.join("dataon_dumps", "datasets_part*.jsonl"))
+    ap.add_argument("--out",     default=None, help="zst 파트 저장 위치 (기본: 임시 디렉토리, 끝나면 삭제)")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--level",   type=int, default=jsonl_store.ZSTD_LEVEL)
+    args = ap.parse_args()
+
+    files = sorted(p for p in glob.glob(args.input) if p.endswith(".jsonl"))
+    if not files:
+        print(f"[SKIP] 입력 파일 없음: {args.input}")
+        return
+    out_dir = args.out or tempfile.mkdtemp(prefix="jsonl_store_")
+    os.makedirs(out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    parts = [convert(p, os.path.join(out_dir, os.path.basename(p) + jsonl_store.SUFFIX), level=args.level)
+             for p in files]
+    conv_s = time.perf_counter() - t0
+
+    plain_mb = sum(os.path.getsize(p) for p in files) / 1e6
+    zst_mb = sum(os.path.getsize(p) for p in parts) / 1e6
+    idx_mb = sum(os.path.getsize(index_path(p)) for p in parts) / 1e6
+    print(f"[disk] {len(files)} parts  plain {plain_mb:,.1f}MB  →  zst {zst_mb:,.1f}MB + idx {idx_mb:,.1f}MB "
+          f"({(zst_mb + idx_mb) / max(1e-9, plain_mb):.1%}, level {args.level}, 변환 {conv_s:.1f}s)")
+
+    n_plain, dt = timed(lambda: sum(1 for _ in plain_records(files)))
+    print(f"[read] plain sequential      {n_plain / dt:>12,.0f} rec/s  {plain_mb / dt:>8,.1f} MB/s  ({dt:.2f}s)")
+    for w in args.workers:
+        n, dt = timed(lambda: sum(1 for _ in iter_records(parts, workers=w)))
+        assert n == n_plain, f"레코드 수 불일치: {n} != {n_plain}"
+        print(f"[read] zst workers={w:<3}        {n / dt:>12,.0f} rec/s  {plain_mb / dt:>8,.1f} MB/s  ({dt:.2f}s)")
+
+    ids_plain, dt_plain = timed(lambda: {r["id"] for r in plain_records(files) if "id" in r})
+    ids_zst, dt_zst = timed(lambda: load_ids(parts))
+    assert ids_plain == ids_zst, "id 집합 불일치"
+    print(f"[ids ] load_seen_ids  plain {dt_plain * 1000:,.0f}ms  →  index {dt_zst * 1000:,.0f}ms  "
+          f"({len(ids_zst):,} ids)")
+
+    if args.out is None:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+PyTorch(sentence-transformers) vs ONNX Runtime 백엔드 비교: 배치 크기 1 ~ 256.
+- SBERT: SBERTBackend.encode vs ONNXSBERTBackend.encode
+- CE   : CrossEncoder.predict vs ONNXCrossEncoder.predict
+- 배치별 호출 지연 p50 (ms) / 처리량 (items/s) / 두 백엔드 출력 최대 차이
+- 입력은 코퍼스 제목+설명 샘플 (CSV 가 없으면 고정 문장)
+
+실행:
+  PYTHONPATH=src/Modeling python scripts/eval/bench_onnx.py --which sbert ce --batches 1 4 16 64 256
+"""
+import argparse, os, time
+import numpy as np
+import pandas as pd
+import pipeline
+from pipeline import SBERTBackend, SBERT_MODEL_NAME_OR_PATH, CE_MODEL, safe_text
+
+def sample_texts(path: str, n: int) -> list:
+    if os.path.exists(path):
+        df = pd.read_csv(path).fillna("")
+        df = df.sample(min(n, len(df)), random_state=42)
+        texts = [f"{safe_text(t)} {safe_text(d)[:300]}".strip() for t, d in zip(df["title"], df["description"])]
+    else:
+        texts = ["기후 변화에 따른 농작물 생산성 예측 데이터", "딥러닝 기반 의료 영상 분할 연구",
+                 "도시 교통량 시계열 분석", "Korean named entity recognition corpus"]
+    return [texts[i % len(texts)] for i in range(n)]
+
+def bench(fn, inputs, reps: int):
+    fn(inputs)  # 워밍업 (세션/스레드 풀 초기화)
+    ts = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn(inputs)
+        ts.append(time.perf_counter() - t0)
+    return float(np.median(ts)), np.asarray(out, dtype=np.float64)
+
+def run(name, torch_fn, onnx_fn, make_inputs, batches, reps):
+    print(f"\n[{name}]  batch |   torch p50 ms    items/s |    onnx p50 ms    items/s | speedup | max|diff|")
+    for b in batches:
+        inputs = make_inputs(b)
+        r = max(1, reps if b <= 32 else reps // 4)
+        t_torch, y_torch = bench(torch_fn, inputs, r)
+        t_onnx, y_onnx = bench(onnx_fn, inputs, r)
+        diff = float(np.max(np.abs(y_torch - y_onnx))) if y_torch.size else 0.0
+        print(f"{'':>{len(name) + 3}}{b:>6} | {t_torch * 1000:>14.1f} {b / t_torch:>10.1f} | "
+              f"{t_onnx * 1000:>14.1f} {b / t_onnx:>10.1f} | {t_torch / t_onnx:>6.2f}x | {diff:.2e}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",  default="papers_clean.prep.csv")
+    ap.add_argument("--which",   nargs="+", choices=["sbert", "ce"], default=["sbert", "ce"])
+    ap.add_argument("--batches", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64, 128, 256])
+    ap.add_argument("--reps",    type=int, default=20)
+    args = ap.parse_args()
+
+    from onnx_backend import ONNXSBERTBackend, ONNXCrossEncoder
+    texts = sample_texts(args.papers, max(args.batches) * 2)
+
+    if "sbert" in args.which:
+        t0 = time.perf_counter()
+        onnx_be = ONNXSBERTBackend(SBERT_MODEL_NAME_OR_PATH)
+        print(f"[sbert] ONNX load (export/최적화 캐시 포함) {time.perf_counter() - t0:.1f}s")
+        torch_be = SBERTBackend(SBERT_MODEL_NAME_OR_PATH)
+        run("sbert", torch_be.encode, onnx_be.encode, lambda b: texts[:b], args.batches, args.reps)
+
+    if "ce" in args.which:
+        t0 = time.perf_counter()
+        onnx_ce = ONNXCrossEncoder(CE_MODEL)
+        print(f"[ce] ONNX load (export/최적화 캐시 포함) {time.perf_counter() - t0:.1f}s")
+        pipeline.BACKEND = "torch"
+        torch_ce = pipeline._load_cross_encoder()
+        run("ce", torch_ce.predict, onnx_ce.predict,
+            lambda b: [(texts[i], texts[b + i]) for i in range(b)], args.batches, args.reps)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Clarify ↔ 검색 겹쳐 실행 지연 비교: 순차(Clarify → recommend) vs 겹침(recommend_overlapped).
+- 요청별 전체 지연의 p50/p95 출력
+- 두 방식의 결과가 동일한지 확인 (deadline 초과로 한국어 결과만 낸 요청 수도 함께 출력)
+- 응답 캐시는 끄고 측정, Clarify 결과 캐시는 각 실행 전에 비움 (두 방식 모두 Clarify 를 실제로 수행)
+
+실행:
+  PYTHONPATH=src/Modeling:src/Clarify python scripts/eval/bench_overlap.py --no-ce
+  (모델 없이 흐름만 볼 때) ... --simulate-clarify-ms 800
+"""
+import argparse, os, time
+import numpy as np
+import pandas as pd
+import pipeline
+from pipeline import load_df, get_backend, Pipeline
+
+def pct(xs, q):
+    return float(np.percentile(np.asarray(xs) * 1000, q))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--queries",  default="queries.csv", help="title,desc 컬럼 (없으면 코퍼스 제목 샘플)")
+    ap.add_argument("--n",        type=int, default=32)
+    ap.add_argument("--deadline", type=float, default=pipeline.CLARIFY_DEADLINE_S)
+    ap.add_argument("--simulate-clarify-ms", type=float, default=None,
+                    help="ClarifyModule 대신 지정 시간만큼 대기 후 원문을 돌려주는 clarify 사용")
+    ap.add_argument("--no-ce", action="store_true")
+    args = ap.parse_args()
+
+    pipeline.USE_RESPONSE_CACHE = False
+    if args.no_ce:
+        pipeline.USE_CE = False
+
+    backend  = get_backend()
+    papers   = load_df(args.papers)
+    datasets = load_df(args.datasets)
+    if os.path.exists(args.queries):
+        qdf = pd.read_csv(args.queries).fillna("")
+        queries = list(zip(qdf["title"], qdf.get("desc", [""] * len(qdf))))[:args.n]
+    else:
+        sample = papers.sample(min(args.n, len(papers)), random_state=42)
+        queries = [(t, "") for t in sample["title"].fillna("").astype(str)]
+
+    clear_cache = lambda: None
+    if args.simulate_clarify_ms is not None:
+        def clarify(text):
+            time.sleep(args.simulate_clarify_ms / 1000)
+            return text
+    else:
+        from clarify_utils import ClarifyModule
+        clarifier = ClarifyModule()
+        clarify, clear_cache = clarifier.clarify, clarifier.clear_cache
+
+    pipe = Pipeline(papers, datasets, backend)
+    pipe.recommend("warm up", "", topk=1)
+
+    seq_t, ovl_t, same, fallback = [], [], 0, 0
+    for title, desc in queries:
+        clear_cache()
+        t0 = time.perf_counter()
+        en_title = clarify(title) if title else None
+        en_desc  = clarify(desc) if desc else None
+        a = pipe.recommend(title, desc, en_title=en_title, en_desc=en_desc)
+        seq_t.append(time.perf_counter() - t0)
+
+        clear_cache()  # 겹침 실행이 순차 실행의 Clarify 결과를 캐시에서 재사용하지 않도록
+        t0 = time.perf_counter()
+        b = pipe.recommend_overlapped(title, desc, clarify, deadline=args.deadline)
+        ovl_t.append(time.perf_counter() - t0)
+
+        if a.equals(b):
+            same += 1
+        elif b.equals(pipe.recommend(title, desc)):
+            fallback += 1
+
+    print(f"[n={len(queries)}] deadline={args.deadline:.1f}s")
+    print(f"  sequential  p50={pct(seq_t, 50):8.1f}ms  p95={pct(seq_t, 95):8.1f}ms")
+    print(f"  overlapped  p50={pct(ovl_t, 50):8.1f}ms  p95={pct(ovl_t, 95):8.1f}ms")
+    print(f"  identical={same}/{len(queries)}  korean-only fallback={fallback}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+자동완성 인덱스(cache/suggest.bin) 지연/적중 확인.
+- 코퍼스 제목을 한 글자씩(한글은 자모 단위로, 입력기 조합 중 상태 포함) 입력하는 상황을 재현
+- 입력 길이별 질의 지연 p50 / p99 (ms)
+- 적중률: 해당 prefix 에서 원래 제목이 Top-K 안에 드는 비율 (입력 길이별)
+- 키 길이(MAX_KEY_CHARS)보다 긴 prefix: 제목 전체(일치 적음) / 제목 + 없는 글자(일치 없음) 질의의
+  지연과 잘린 키 구간 크기 → 후필터가 MAX_LONG_CANDIDATES 개에서 멈추는지 확인
+
+실행:
+  PYTHONPATH=src/Modeling python scripts/eval/bench_suggest.py --index cache/suggest.bin --n 300
+"""
+import argparse, time
+from collections import defaultdict
+import numpy as np
+from pipeline import load_df
+from suggest import SuggestIndex, SUGGEST_FILE, MAX_KEY_CHARS, MAX_LONG_CANDIDATES, normalize, query_norm, to_jamo, _CHO, _JUNG
+
+_CHO_I = {c: i for i, c in enumerate(_CHO)}
+_JUNG_I = {v: i for i, v in enumerate(_JUNG)}
+
+def typing_states(title: str, max_chars: int) -> list:
+    """제목 앞 max_chars 글자를 입력할 때 화면에 보이는 중간 상태들 (예: 한 → ㅎ, 하, 한)"""
+    states, done = [], ""
+    for ch in title[:max_chars]:
+        jamo = to_jamo(ch)
+        if jamo != ch and len(jamo) >= 2 and jamo[0] in _CHO_I:
+            states.append(done + jamo[0])
+            v = next((v for v in sorted(_JUNG_I, key=len, reverse=True) if jamo[1:].startswith(v)), None)
+            if v is not None:
+                states.append(done + chr(0xAC00 + _CHO_I[jamo[0]] * 588 + _JUNG_I[v] * 28))
+        done += ch
+        states.append(done)
+    return list(dict.fromkeys(s for s in states if s.strip()))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--index",    default=SUGGEST_FILE)
+    ap.add_argument("--n",        type=int, default=300, help="샘플 제목 수")
+    ap.add_argument("--chars",    type=int, default=8, help="제목 앞 몇 글자까지 입력할지")
+    ap.add_argument("--k",        type=int, default=10)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    idx = SuggestIndex(args.index)
+    print(f"[suggest] {len(idx)} entries / {idx.n_keys} keys, open {(time.perf_counter() - t0) * 1000:.2f}ms")
+
+    titles = []
+    for path in (args.papers, args.datasets):
+        df = load_df(path)
+        titles += df["title"].dropna().astype(str).tolist()
+    rng = np.random.default_rng(42)
+    sample = [titles[i] for i in rng.choice(len(titles), min(args.n, len(titles)), replace=False)]
+
+    lat, hit = defaultdict(list), defaultdict(list)
+    for title in sample:
+        target = normalize(title)
+        for q in typing_states(" ".join(title.split()), args.chars):
+            t0 = time.perf_counter()
+            res = idx.suggest(q, args.k)
+            dt = time.perf_counter() - t0
+            n = len(q)
+            lat[n].append(dt)
+            hit[n].append(any(normalize(r["text"]) == target for r in res))
+
+    all_lat = np.concatenate([np.asarray(v) for v in lat.values()]) * 1000
+    print(f"  all  n={len(all_lat):>6}  p50={np.percentile(all_lat, 50):.3f}ms  p99={np.percentile(all_lat, 99):.3f}ms")
+    for n in sorted(lat):
+        ms = np.asarray(lat[n]) * 1000
+        print(f"  len={n:<3} n={len(ms):>6}  p50={np.percentile(ms, 50):.3f}ms  p99={np.percentile(ms, 99):.3f}ms  "
+              f"hit@{args.k}={np.mean(hit[n]):.3f}")
+
+    # 키보다 긴 prefix: 잘린 키(앞 MAX_KEY_CHARS 글자) 구간은 넓어도 실제 일치는 적은 경우
+    longs = [t for t in dict.fromkeys(titles) if len(normalize(t)) > MAX_KEY_CHARS]
+    longs = [longs[i] for i in rng.choice(len(longs), min(args.n, len(longs)), replace=False)] if longs else []
+    print(f"  long prefix (> {MAX_KEY_CHARS} chars, 후필터 상한 {MAX_LONG_CANDIDATES}): {len(longs)} titles")
+    for name, make in (("full", lambda t: t), ("miss", lambda t: t + " 꿿")):
+        ms, found, span = [], [], []
+        for title in longs:
+            q = make(title)
+            lo, hi = idx.prefix_range(to_jamo(query_norm(q)[:MAX_KEY_CHARS]).encode("utf-8"))
+            t0 = time.perf_counter()
+            res = idx.suggest(q, args.k)
+            ms.append((time.perf_counter() - t0) * 1000)
+            found.append(any(normalize(r["text"]) == normalize(title) for r in res) if name == "full" else len(res))
+            span.append(hi - lo)
+        if longs:
+            print(f"  {name:<4} n={len(ms):>6}  p50={np.percentile(ms, 50):.3f}ms  p99={np.percentile(ms, 99):.3f}ms  "
+                  f"keys in range max={max(span)}  " + (f"hit@{args.k}={np.mean(found):.3f}" if name == "full" else f"results={np.mean(found):.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+build_search_artifact.py 산출물 검증: 아티팩트 검색(엣지 함수와 같은 방식) Top-K 가
+WeightedBM25.score Top-K 와 얼마나 일치하는지 확인.
+- overlap@K: 두 Top-K 집합의 교집합 비율 (양자화로 동점 근처 순서만 바뀌는 경우 허용)
+- exact: Top-K 순서까지 동일한 질의 비율
+- 아티팩트 로드 시간 / 질의당 검색 시간
+- --golden: 질의별 아티팩트 Top-K (doc id, 점수)와 WeightedBM25 Top-K 를 JSON 으로 저장
+  → 엣지 함수의 TS 리더(search_artifact.ts: fnv1a / 샤드 파싱 / 역양자화)를 search_artifact_test.ts 가 같은 값인지 검증
+
+실행:
+  PYTHONPATH=src/Modeling:scripts/data_prep python scripts/eval/check_search_artifact.py \
+      --input data/cleaned/papers_clean.jsonl --artifact cache/search_artifact --golden cache/search_artifact.golden.json
+  deno test --allow-read --allow-env supabase/functions/recommend-papers/search_artifact_test.ts
+"""
+import argparse, gzip, json, struct, time
+from pathlib import Path
+import numpy as np
+import orjson
+from pipeline import lite_tokens, WeightedBM25, FIELD_WEIGHTS
+from build_search_artifact import MAGIC, fnv1a, load_papers
+
+class SearchArtifact:
+    def __init__(self, path: str):
+        self.dir = Path(path)
+        self.manifest = json.load(open(self.dir / "manifest.json", encoding="utf-8"))
+        self.docs = orjson.loads(gzip.open(self.dir / self.manifest["docs"]).read())
+        self._shards = {}
+
+    def _shard(self, s: int):
+        if s not in self._shards:
+            buf = gzip.open(self.dir / self.manifest["shards"][s]).read()
+            assert buf[:4] == MAGIC, "bad shard magic"
+            n_terms, n_post = struct.unpack_from("<II", buf, 4)
+            o = 12
+            term_off = np.frombuffer(buf, "<u4", n_terms + 1, o); o += 4 * (n_terms + 1)
+            blob = buf[o:o + int(term_off[-1])]; o += int(term_off[-1])
+            post_off = np.frombuffer(buf, "<u4", n_terms + 1, o); o += 4 * (n_terms + 1)
+            scale = np.frombuffer(buf, "<f4", n_terms, o); o += 4 * n_terms
+            doc_ids = np.frombuffer(buf, "<u4", n_post, o); o += 4 * n_post
+            impacts = np.frombuffer(buf, "u1", n_post, o)
+            terms = {blob[term_off[i]:term_off[i + 1]].decode("utf-8"): i for i in range(n_terms)}
+            self._shards[s] = (terms, post_off, scale, doc_ids, impacts)
+        return self._shards[s]
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(self.manifest["n_docs"], dtype=np.float64)
+        for t in lite_tokens(query):
+            terms, post_off, scale, doc_ids, impacts = self._shard(fnv1a(t) % self.manifest["n_shards"])
+            i = terms.get(t)
+            if i is None:
+                continue
+            lo, hi = post_off[i], post_off[i + 1]
+            out[doc_ids[lo:hi]] += impacts[lo:hi] * float(scale[i])
+        return out
+
+def topk(scores: np.ndarray, k: int) -> list:
+    idx = np.flatnonzero(scores > 0)
+    return idx[np.argsort(-scores[idx], kind="stable")][:k].tolist()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default="data/cleaned/papers_clean.jsonl")
+    ap.add_argument("--artifact", default="cache/search_artifact")
+    ap.add_argument("--n", type=int, default=200, help="검증 질의 수 (코퍼스 제목 샘플)")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--golden", default=None, help="TS 리더 검증용 Top-K 저장 경로")
+    args = ap.parse_args()
+
+    df = load_papers(args.input)
+    bm25 = WeightedBM25(df, FIELD_WEIGHTS)
+    t0 = time.perf_counter()
+    art = SearchArtifact(args.artifact)
+    for s in range(art.manifest["n_shards"]):
+        art._shard(s)
+    load_s = time.perf_counter() - t0
+    assert art.manifest["n_docs"] == len(df), "아티팩트와 입력 코퍼스의 문서 수가 다름"
+
+    rng = np.random.default_rng(42)
+    titles = df["title"].fillna("").astype(str).tolist()
+    queries = [" ".join(titles[i].split()[:6]) for i in rng.choice(len(df), min(args.n, len(df)), replace=False)]
+
+    overlaps, exact, dt, golden = [], 0, 0.0, []
+    for q in queries:
+        want = topk(bm25.score(lite_tokens(q)), args.k)
+        t0 = time.perf_counter()
+        scores = art.scores(q)
+        got = topk(scores, args.k)
+        dt += time.perf_counter() - t0
+        golden.append({"query": q, "top": [[d, float(scores[d])] for d in got], "bm25_top": want})
+        if want:
+            overlaps.append(len(set(want) & set(got)) / len(want))
+        exact += got == want
+
+    print(f"[artifact] {art.manifest['n_docs']} docs / {art.manifest['n_shards']} shards, load {load_s * 1000:.0f}ms")
+    print(f"  overlap@{args.k} = {np.mean(overlaps):.4f}  exact = {exact}/{len(queries)}  "
+          f"search = {dt / max(1, len(queries)) * 1000:.2f}ms/query")
+    if args.golden:
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump({"artifact": art.manifest["version"], "k": args.k,
+                       "min_overlap": float(np.mean(overlaps)) if overlaps else 1.0, "queries": golden},
+                      f, ensure_ascii=False)
+        print(f"  golden → {args.golden}")
+
+if __name__ == "__main__":
+    main()
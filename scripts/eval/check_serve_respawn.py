@@ -0,0 +1,74 @@
+"""
+serve.py 워커 재기동 검증: 워커 하나를 SIGKILL 로 죽인 뒤 부모가 새로 fork 한 워커가 요청을 처리하는지 확인.
+- serve.py 를 하위 프로세스로 띄우고 /stats 가 응답할 때까지 대기
+- /stats 의 pid(요청을 받은 워커)를 죽이고, 다른 pid 가 /stats · /recommend 에 200 으로 응답하는지 확인
+- 재기동된 워커가 곧바로 다시 죽지 않는지(같은 pid 가 계속 응답하는지)도 확인 (--workers 1 기본)
+
+실행:
+  PYTHONPATH=src/Modeling python scripts/eval/check_serve_respawn.py -- --papers papers_clean.prep.csv
+  (-- 뒤 인자는 serve.py 에 그대로 전달)
+"""
+import argparse, json, os, signal, subprocess, sys, time, urllib.error, urllib.request
+
+SERVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "Modeling", "serve.py")
+
+def request(url, body=None, timeout=10):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=timeout) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+    except OSError:
+        return None, None
+
+def wait_for(fn, timeout):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        out = fn()
+        if out:
+            return out
+        time.sleep(0.2)
+    return None
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--serve",   default=SERVE, help="실행할 서버 스크립트")
+    ap.add_argument("--port",    type=int, default=8765)
+    ap.add_argument("--timeout", type=float, default=300, help="기동/재기동 대기 상한(초)")
+    ap.add_argument("serve_args", nargs="*", help="serve.py 에 넘길 인자 (-- 뒤에)")
+    args = ap.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    proc = subprocess.Popen([sys.executable, args.serve, "--workers", "1", "--port", str(args.port),
+                             *args.serve_args])
+    ok = False
+    try:
+        stats = lambda: (lambda s, b: b if s == 200 else None)(*request(f"{base}/stats"))
+        first = wait_for(stats, args.timeout)
+        assert first, "서버가 기동되지 않음"
+        old = first["pid"]
+        print(f"[serve] worker {old} 응답 → SIGKILL")
+        os.kill(old, signal.SIGKILL)
+
+        new = wait_for(lambda: (lambda b: b if b and b["pid"] != old else None)(stats()), args.timeout)
+        assert new, "재기동된 워커가 응답하지 않음"
+        status, body = request(f"{base}/recommend", {"title": "딥러닝 의료 영상", "topk": 3}, timeout=args.timeout)
+        assert status == 200 and body.get("results"), f"재기동 워커 /recommend 실패: {status} {body}"
+
+        time.sleep(2)  # 재기동 워커가 준비 신호 후 곧바로 종료되는 경우 잡기
+        pids = {stats()["pid"] for _ in range(5)}
+        assert pids == {new["pid"]}, f"재기동 워커가 유지되지 않음: {new['pid']} → {pids}"
+        assert proc.poll() is None, "부모 프로세스 종료됨"
+        print(f"[OK] worker {old} → {new['pid']} 재기동 후 /recommend {len(body['results'])}건 응답")
+        ok = True
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
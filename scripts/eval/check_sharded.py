@@ -0,0 +1,70 @@
+"""
+샤드 인덱스 검증: ShardedPipeline(샤드 수 1, 2, 4 …) 결과가 단일 인덱스 Pipeline 결과와 동일한지 확인하고
+샤드 수별 처리량(QPS)을 비교.
+- --mode local   : 같은 프로세스 샤드 (LocalShard)
+- --mode process : 로컬 워커 프로세스 샤드 (RemoteShard, multiprocessing.connection RPC)
+- 임베딩은 단일 인덱스에서 한 번 계산한 행렬을 샤드 구간별로 잘라 사용 (배치 구성에 따른 미세 차이 배제)
+- 응답 캐시는 끄고 측정
+
+실행:
+  PYTHONPATH=src/Modeling python scripts/eval/check_sharded.py --shards 1 2 4 --mode process --no-ce
+"""
+import argparse, os, time
+import pandas as pd
+import pipeline
+from pipeline import load_df, get_backend, Pipeline
+from sharded import ShardedPipeline, local_shards, spawn_process_shards
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--queries",  default="queries.csv", help="title,desc 컬럼 (없으면 코퍼스 제목 샘플)")
+    ap.add_argument("--n",        type=int, default=32)
+    ap.add_argument("--shards",   type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--mode",     choices=["local", "process"], default="process")
+    ap.add_argument("--no-ce", action="store_true")
+    args = ap.parse_args()
+
+    pipeline.USE_RESPONSE_CACHE = False
+    if args.no_ce:
+        pipeline.USE_CE = False
+
+    backend  = get_backend()
+    papers   = load_df(args.papers)
+    datasets = load_df(args.datasets)
+    if os.path.exists(args.queries):
+        qdf = pd.read_csv(args.queries).fillna("")
+        queries = list(zip(qdf["title"], qdf.get("desc", [""] * len(qdf))))[:args.n]
+    else:
+        sample = papers.sample(min(args.n, len(papers)), random_state=42)
+        queries = [(t, "") for t in sample["title"].fillna("").astype(str)]
+
+    single = Pipeline(papers, datasets, backend)
+    index = single.index
+    t0 = time.perf_counter()
+    expected = [single.recommend(t, d) for t, d in queries]
+    base_qps = len(queries) / (time.perf_counter() - t0)
+    print(f"single index        QPS={base_qps:8.2f}")
+
+    for n in args.shards:
+        if args.mode == "local":
+            shards, procs = local_shards(papers, datasets, backend, n, index.p_vecs, index.d_vecs), []
+        else:
+            shards, procs = spawn_process_shards(papers, datasets, n, index.p_vecs, index.d_vecs)
+        sharded = ShardedPipeline(papers, datasets, backend, shards)
+        sharded.recommend("warm up", "", topk=1)
+
+        t0 = time.perf_counter()
+        got = [sharded.recommend(t, d) for t, d in queries]
+        qps = len(queries) / (time.perf_counter() - t0)
+        same = sum(g.equals(e) for g, e in zip(got, expected))
+        print(f"{args.mode:>7} shards={n:<3} QPS={qps:8.2f}  vs single={qps / base_qps:5.2f}x  "
+              f"identical={same}/{len(queries)}")
+
+        sharded.close()
+        for proc in procs:
+            proc.terminate()
+
+if __name__ == "__main__":
+    main()
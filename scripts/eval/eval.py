@@ -1,8 +1,13 @@
 """
 검증용 쿼리/정답(qrels)을 입력받아 nDCG@10, MRR@10, Recall@10 계산.
 포맷 예) queries.csv: id,title,desc / qrels.csv: id,doc_id,rel
+
+--clarify: Clarify 라우팅(skip/greedy/full) 영향 평가
+  - 경로별 질의 비율, Clarify 지연(평균/p95)
+  - 품질: Clarify 없음 / 항상 full / 라우팅 세 가지 설정의 지표 비교
+  PYTHONPATH=src/Modeling:src/Clarify python scripts/eval/eval.py --clarify
 """
-import argparse, pandas as pd, numpy as np
+import argparse, time, pandas as pd, numpy as np
 from pipeline import load_df, get_backend, multistage_recommend
 
 def ndcg_at_k(rel, k=10):
@@ -20,10 +25,46 @@ def recall_at_k(rel, k=10):
     rel = np.array(rel)
     return (rel[:k] > 0).sum() / max(1, (rel > 0).sum())
 
+def evaluate(qdf, rdf, papers, datasets, backend, en=None):
+    """en: 질의 id → (en_title, en_desc). None 이면 한국어 입력만 사용"""
+    rows = []
+    for _, q in qdf.iterrows():
+        en_title, en_desc = en[q["id"]] if en else (None, None)
+        df = multistage_recommend(q["title"], q.get("desc",""), papers, datasets, backend, topk=10,
+                                  en_title=en_title, en_desc=en_desc)
+        # 정답 매핑
+        truth = rdf[rdf["id"] == q["id"]]
+        rel = [(1 if any(str(t) in r["URL"] or str(t) in r["제목"] for t in truth["doc_id"]) else 0)
+               for _, r in df.iterrows()]
+        rows.append((ndcg_at_k(rel,10), mrr_at_k(rel,10), recall_at_k(rel,10)))
+    return np.array(rows)
+
+def report(name, arr):
+    print(f"{name}nDCG@10={arr[:,0].mean():.3f}  MRR@10={arr[:,1].mean():.3f}  Recall@10={arr[:,2].mean():.3f}")
+
+def run_clarify(qdf, clarifier, route=None):
+    """질의별 (en_title, en_desc), 질의별 Clarify 지연(초), 경로 목록"""
+    en, lat, routes = {}, [], []
+    for _, q in qdf.iterrows():
+        t0 = time.perf_counter()
+        out = []
+        for text in (q["title"], q.get("desc", "")):
+            text = "" if pd.isna(text) else str(text)
+            if not text.strip():
+                out.append(None)
+                continue
+            clarified, decision = clarifier.clarify_routed(text, route=route)
+            out.append(clarified)
+            routes.append(decision.route)
+        lat.append(time.perf_counter() - t0)
+        en[q["id"]] = tuple(out)
+    return en, np.array(lat), routes
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--queries", default="queries.csv")
     ap.add_argument("--qrels",   default="qrels.csv")
+    ap.add_argument("--clarify", action="store_true", help="Clarify 라우팅 경로 비율/지연/품질 비교")
     args = ap.parse_args()
 
     qdf = pd.read_csv(args.queries)
@@ -33,17 +74,24 @@ def main():
     papers   = load_df("papers_clean.prep.csv")
     datasets = load_df("datasets_clean_prep.csv")
 
-    rows = []
-    for _, q in qdf.iterrows():
-        df = multistage_recommend(q["title"], q.get("desc",""), papers, datasets, backend, topk=10)
-        # 정답 매핑
-        truth = rdf[rdf["id"] == q["id"]]
-        rel = [(1 if any(str(t) in r["URL"] or str(t) in r["제목"] for t in truth["doc_id"]) else 0)
-               for _, r in df.iterrows()]
-        rows.append((ndcg_at_k(rel,10), mrr_at_k(rel,10), recall_at_k(rel,10)))
+    base = evaluate(qdf, rdf, papers, datasets, backend)
+    if not args.clarify:
+        report("", base)
+        return
+
+    from clarify_utils import ClarifyModule
+    clarifier = ClarifyModule()
+    en_full, lat_full, _ = run_clarify(qdf, clarifier, route="full")
+    clarifier.clear_cache()
+    en_routed, lat_routed, routes = run_clarify(qdf, clarifier)
 
-    arr = np.array(rows)
-    print(f"nDCG@10={arr[:,0].mean():.3f}  MRR@10={arr[:,1].mean():.3f}  Recall@10={arr[:,2].mean():.3f}")
+    print(f"[routes] n={len(routes)}  " + "  ".join(
+        f"{r}={routes.count(r) / max(1, len(routes)):.1%}" for r in ("skip", "greedy", "full")))
+    for name, lat in (("full  ", lat_full), ("routed", lat_routed)):
+        print(f"[latency] {name}  mean={lat.mean()*1000:8.1f}ms  p95={np.percentile(lat, 95)*1000:8.1f}ms")
+    report("[quality] no-clarify  ", base)
+    report("[quality] full        ", evaluate(qdf, rdf, papers, datasets, backend, en_full))
+    report("[quality] routed      ", evaluate(qdf, rdf, papers, datasets, backend, en_routed))
 
 if __name__ == "__main__":
     main()
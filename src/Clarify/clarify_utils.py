@@ -13,6 +13,9 @@ import os
 import re
 import torch
 import logging
+import threading
+from collections import OrderedDict, Counter
+from dataclasses import dataclass
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 
 # 설정 (모델 경로 및 실행 환경)
@@ -23,6 +26,26 @@ device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 MODEL_TRANSLATE = "Helsinki-NLP/opus-mt-ko-en"  # 한국어 → 영어 번역기
 MODEL_CLARIFY_EN = "google/flan-t5-base"        # 영어 문장 명확화 모델
 
+# 라우팅 설정 (생성 생략 / greedy 짧은 디코딩 / 전체 beam 경로)
+# - 코퍼스 어휘 파일: scripts/data_prep/build_cache.py 가 cache/vocab.txt 로 저장
+CLARIFY_VOCAB = os.getenv("CLARIFY_VOCAB", os.path.join("cache", "vocab.txt"))
+ROUTE_SKIP_CONF = 0.75     # 이 이상이면 Clarify 생략 (한국어는 번역만)
+ROUTE_GREEDY_CONF = 0.40   # 이 이상이면 greedy 짧은 디코딩, 미만이면 전체 beam
+CLARIFY_CACHE_SIZE = int(os.getenv("CLARIFY_CACHE_SIZE", "1024"))
+
+# 프롬프트에서 문맥에 따라 구체화하라고 지시하는 모호어 (포함 비율만큼 confidence 감소)
+AMBIGUOUS_WORDS = {
+    "model", "models", "system", "systems", "analysis", "method", "methods", "data",
+    "ai", "learning", "network", "networks", "technology", "application", "applications",
+    "모델", "시스템", "분석", "방법", "데이터", "기술", "활용", "응용",
+}
+
+# 라우팅 특징 계산에서 제외하는 기능어 / 일반 요청어
+ROUTE_STOPWORDS = {
+    "about", "for", "of", "the", "and", "in", "on", "with", "to", "an", "using", "based",
+    "관련", "논문", "연구", "관한", "대한",
+}
+
 # 로깅 설정 (INFO 레벨: 주요 이벤트만 출력)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Clarify")
@@ -58,6 +81,73 @@ def _clean_query(text: str) -> str:
     return text
 
 
+# 질의 라우터 (생성 전 단계)
+_rx_token = re.compile(r"[가-힣A-Za-z0-9]+")
+
+
+def _tokens(text: str) -> list:
+    """추천 파이프라인(lite_tokens)과 같은 토큰화: 소문자, 길이 2 이상"""
+    return [t.lower() for t in _rx_token.findall(text or "") if len(t) > 1]
+
+
+def load_vocab(path: str = CLARIFY_VOCAB):
+    """코퍼스 어휘(한 줄에 한 토큰). 파일이 없으면 None"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    route: str          # "skip" | "greedy" | "full"
+    confidence: float
+    coverage: float     # 코퍼스 어휘에 있는 토큰 비율 (어휘 없으면 0.5)
+    n_tokens: int
+
+
+class QueryRouter:
+    """
+    _clean_query 결과만 보고 Clarify 생성 경로를 고르는 가벼운 규칙 기반 라우터
+    - 길이: 토큰 2~12개가 제목 수준 질의 (1개는 모호, 너무 길면 요약 필요)
+    - 커버리지: 코퍼스 어휘에 있는 토큰 비율 (높을수록 그대로 검색해도 매칭됨)
+    - confidence = 커버리지 × √(1 - 모호어 비율) × 길이 계수
+      (모호어 하나가 섞인 'semiconductor defect analysis' 는 생략, 'AI model' 은 전체 경로)
+    """
+
+    def __init__(self, vocab=None, skip_conf: float = ROUTE_SKIP_CONF, greedy_conf: float = ROUTE_GREEDY_CONF,
+                 min_tokens: int = 2, max_tokens: int = 12):
+        self.vocab = vocab
+        self.skip_conf = skip_conf
+        self.greedy_conf = greedy_conf
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+
+    def route(self, query_clean: str) -> RouteDecision:
+        toks = [t for t in _tokens(query_clean) if t not in ROUTE_STOPWORDS]
+        n = len(toks)
+        if n == 0:
+            return RouteDecision("full", 0.0, 0.0, 0)
+
+        coverage = sum(t in self.vocab for t in toks) / n if self.vocab else 0.5
+        ambiguous = sum(t in AMBIGUOUS_WORDS for t in toks) / n
+        if n < self.min_tokens:
+            length = n / self.min_tokens
+        elif n > self.max_tokens:
+            length = self.max_tokens / n
+        else:
+            length = 1.0
+        confidence = coverage * (1.0 - ambiguous) ** 0.5 * length
+
+        if confidence >= self.skip_conf:
+            route = "skip"
+        elif confidence >= self.greedy_conf:
+            route = "greedy"
+        else:
+            route = "full"
+        return RouteDecision(route, round(confidence, 4), round(coverage, 4), n)
+
+
 # 번역기 (ko → en)
 class Translator:
     """한국어 질의를 영어로 변환하는 번역기 클래스"""
@@ -89,11 +179,12 @@ class ClarifierEN:
         self.model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_CLARIFY_EN).to(device)
         logger.info("English Clarify model loaded.")
 
-    def clarify(self, text: str) -> str:
+    def clarify(self, text: str, mode: str = "full") -> str:
         """
         Flan-T5를 이용해 영어 질의를 논문 제목 수준으로 명확화
         - 'AI model research' → 'Deep learning-based medical imaging model evaluation'
         - 명령형 표현/모호한 단어 제거
+        - mode="greedy": 샘플링/beam 없이 짧게 디코딩 (이미 구체적인 질의용)
         """
         # Flan-T5용 프롬프트 설계: '연구 도우미' 역할 지시
         prompt = (
@@ -111,10 +202,11 @@ class ClarifierEN:
         if "token_type_ids" in inputs:
             inputs.pop("token_type_ids")
 
-        # 생성 파라미터: 다양성 + 일관성 균형 조정
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
+        # 생성 파라미터: 다양성 + 일관성 균형 조정 (greedy 모드는 짧은 결정적 디코딩)
+        if mode == "greedy":
+            gen_kwargs = dict(max_new_tokens=32, num_beams=1, do_sample=False, repetition_penalty=1.5)
+        else:
+            gen_kwargs = dict(
                 max_new_tokens=80,
                 temperature=0.7,
                 top_p=0.9,
@@ -123,6 +215,8 @@ class ClarifierEN:
                 repetition_penalty=1.5,
                 early_stopping=True,
             )
+        with torch.no_grad():
+            outputs = self.model.generate(**inputs, **gen_kwargs)
 
         # 결과 후처리: 불필요한 특수문자/공백 정리
         clarified = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -140,33 +234,78 @@ class ClarifyModule:
     - 영어면 바로 Clarify 수행
     """
 
-    def __init__(self):
+    def __init__(self, router: QueryRouter | None = None, cache_size: int = CLARIFY_CACHE_SIZE):
         logger.info(f"Initializing ClarifyModule on device: {device}")
         self.translator = Translator()
         self.clarifier_en = ClarifierEN()
-
-    def clarify(self, query: str) -> str:
-        """입력 질의를 정제(clean) → 번역(ko→en) → 명확화(Clarify)"""
-        if not query.strip():
-            return ""
-
+        # router=None → 어휘 파일(CLARIFY_VOCAB)이 있으면 사용, 없으면 어휘 없이 길이/모호어만으로 판단
+        self.router = router if router is not None else QueryRouter(load_vocab())
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # (route, query_clean) → 결과
+        self._lock = threading.Lock()
+        self.stats = Counter()        # route 별 호출 수, cache_hits
+
+    def _cache_get(self, key):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+            return value
+
+    def _cache_put(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        """결과 캐시 비우기 (평가/벤치마크에서 경로·실행 간 캐시 재사용 방지)"""
+        with self._lock:
+            self._cache.clear()
+
+    def clarify_routed(self, query: str, route: str | None = None):
+        """
+        입력 질의를 정제(clean) → 라우팅 → 번역(ko→en) → 명확화(Clarify)
+        - route 를 지정하면 라우터 판단 대신 해당 경로 강제 (평가용)
+        - 반환: (clarified, RouteDecision)
+        """
         # 불필요 표현 제거
         query_clean = _clean_query(query)
-
-        # 언어 감지
-        lang = _detect_lang(query_clean)
-
-        # 한국어 → 영어 번역 (필요시)
-        if lang == "ko":
+        decision = self.router.route(query_clean)
+        if route is not None:
+            decision = RouteDecision(route, decision.confidence, decision.coverage, decision.n_tokens)
+        with self._lock:
+            self.stats[decision.route] += 1
+
+        key = (decision.route, query_clean)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached, decision
+
+        # 언어 감지 → 한국어 → 영어 번역 (필요시, skip 경로도 번역은 수행)
+        text = query_clean
+        if _detect_lang(query_clean) == "ko":
             logger.info("Detected Korean query → translating to English before Clarify...")
-            query_clean = self.translator.translate(query_clean)
-            logger.info(f"Translated Query (ko→en): {query_clean}")
+            text = self.translator.translate(query_clean)
+            logger.info(f"Translated Query (ko→en): {text}")
+
+        # Clarify (Flan-T5): skip 경로는 생성 생략
+        if decision.route == "skip":
+            clarified = re.sub(r"(^[-–: ]+|[.]+$)", "", text).strip() or text
+        else:
+            clarified = self.clarifier_en.clarify(text, mode=decision.route)
+        logger.info(f"Clarified English Output [{decision.route}, conf={decision.confidence:.2f}]: {clarified}")
 
-        # Clarify (Flan-T5)
-        clarified = self.clarifier_en.clarify(query_clean)
-        logger.info(f"Clarified English Output: {clarified}")
+        self._cache_put(key, clarified)
+        return clarified, decision
 
-        return clarified
+    def clarify(self, query: str) -> str:
+        """입력 질의를 정제(clean) → 번역(ko→en) → 명확화(Clarify)"""
+        if not query.strip():
+            return ""
+        return self.clarify_routed(query)[0]
 
 
 # 테스트 실행 (단독 실행 시)
@@ -184,5 +323,5 @@ if __name__ == "__main__":
 
     # 각 질의 Clarify 결과 출력
     for q in test_queries:
-        result = clarifier.clarify(q)
-        print(f"[Input] {q}\n[Clarified] {result}\n")
+        result, decision = clarifier.clarify_routed(q)
+        print(f"[Input] {q}\n[Route] {decision.route} (conf={decision.confidence:.2f})\n[Clarified] {result}\n")
@@ -0,0 +1,216 @@
+"""
+ONNX Runtime(CPU) 임베딩 / Cross-Encoder 백엔드.
+
+- 최초 1회: transformers 모델을 ONNX 로 export (풀링·정규화 / sigmoid 까지 그래프에 포함)
+  → ONNX_CACHE_DIR/<모델 경로>/{model.onnx, 토크나이저, meta.json} 에 캐시
+- 세션 생성 시 그래프 최적화(ORT_ENABLE_ALL) 결과를 model.opt.onnx 로 저장 → 이후 로드는 최적화 생략
+- 추론은 IO binding(입력 numpy 를 복사 없이 바인딩, 출력은 ORT 할당)으로 실행
+- 쿼리 경로의 작은 배치(쿼리 벡터 1개, CE 15쌍, 사유 문장 5개)에서 호출당 오버헤드 감소
+- 세션은 프로세스별로 첫 추론 때 생성 (생성자에서는 export/토크나이저만, serve.py 부모에는 세션 없음)
+  → 워커 간 가중치 공유 없음: 워커마다 모델 크기만큼 메모리 사용 (bge-reranker-v2-m3 약 2.2GB × 워커 수)
+
+export 에는 torch + transformers, 추론에는 onnxruntime + transformers(토크나이저)만 필요.
+pipeline.get_backend() / ce_predict_pairs() 에서 BACKEND=onnx 일 때 사용하며, 실패 시 PyTorch 로 폴백.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+from pipeline import EmbeddingBackend
+
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join("models", "onnx"))
+ONNX_OPSET = 17
+BATCH_SIZE = 32
+SBERT_MAX_LENGTH = 128   # paraphrase-multilingual-MiniLM 기본 max_seq_length
+CE_MAX_LENGTH = 512      # _load_cross_encoder 와 동일
+_INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def onnx_dir(model_path: str, kind: str) -> str:
+    name = re.sub(r"[^\w.-]+", "_", model_path.strip("/\\"))
+    return os.path.join(ONNX_CACHE_DIR, f"{name}.{kind}")
+
+
+# -------------------- Export (최초 1회) --------------------
+def _sbert_pooling(model_path: str) -> int:
+    """sentence-transformers 설정에서 mean pooling 여부 / max_seq_length 확인 (로컬 경로일 때)"""
+    pool_cfg = os.path.join(model_path, "1_Pooling", "config.json")
+    if os.path.exists(pool_cfg):
+        cfg = json.load(open(pool_cfg, encoding="utf-8"))
+        if not cfg.get("pooling_mode_mean_tokens"):
+            raise NotImplementedError(f"mean pooling 모델만 지원: {pool_cfg}")
+    st_cfg = os.path.join(model_path, "sentence_bert_config.json")
+    if os.path.exists(st_cfg):
+        return int(json.load(open(st_cfg, encoding="utf-8")).get("max_seq_length") or SBERT_MAX_LENGTH)
+    return SBERT_MAX_LENGTH
+
+
+def export_onnx(model_path: str, kind: str) -> str:
+    """kind: "sbert" (mean pooling + L2 정규화) | "ce" (num_labels=1 이면 sigmoid). 캐시 디렉토리 반환"""
+    out = onnx_dir(model_path, kind)
+    if os.path.exists(os.path.join(out, "meta.json")):
+        return out
+
+    import torch
+    from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(model_path)
+    names = [n for n in _INPUT_NAMES if n in tok.model_input_names]
+
+    if kind == "sbert":
+        max_length = _sbert_pooling(model_path)
+        base = AutoModel.from_pretrained(model_path)
+
+        def head(kw):
+            h = base(**kw).last_hidden_state
+            m = kw["attention_mask"].unsqueeze(-1).to(h.dtype)
+            v = (h * m).sum(1) / m.sum(1).clamp(min=1e-9)
+            return torch.nn.functional.normalize(v, p=2, dim=1)
+        output = "embeddings"
+    elif kind == "ce":
+        max_length = CE_MAX_LENGTH
+        base = AutoModelForSequenceClassification.from_pretrained(model_path)
+
+        def head(kw):
+            logits = base(**kw).logits
+            # CrossEncoder.predict 와 동일: 라벨 1개면 sigmoid, 아니면 logit 그대로
+            return torch.sigmoid(logits[:, 0]) if logits.shape[-1] == 1 else logits
+        output = "scores"
+    else:
+        raise ValueError(f"unknown kind: {kind}")
+
+    class _Wrapped(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.base = base
+
+        def forward(self, *args):
+            return head(dict(zip(names, args)))
+
+    base.eval()
+    dummy = tok(["warm up", "export dummy text"], ["warm up", "pair"] if kind == "ce" else None,
+                padding=True, return_tensors="pt")
+    tmp = out + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    with torch.no_grad():
+        # 2GB 초과 모델(bge-reranker-v2-m3)은 가중치가 외부 데이터 파일로 저장됨
+        torch.onnx.export(
+            _Wrapped(), tuple(dummy[n] for n in names), os.path.join(tmp, "model.onnx"),
+            input_names=names, output_names=[output],
+            dynamic_axes={**{n: {0: "batch", 1: "seq"} for n in names}, output: {0: "batch"}},
+            opset_version=ONNX_OPSET, do_constant_folding=True,
+        )
+    tok.save_pretrained(tmp)
+    json.dump({"source": model_path, "kind": kind, "inputs": names, "output": output,
+               "max_length": max_length}, open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8"))
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    return out
+
+
+# -------------------- Session --------------------
+def _create_session(path: str):
+    import onnxruntime as ort
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # serve.py 워커는 fork 후 OMP_NUM_THREADS 를 워커별 스레드 수로 설정
+    threads = int(os.getenv("ONNX_THREADS") or os.getenv("OMP_NUM_THREADS") or 0)
+    if threads > 0:
+        so.intra_op_num_threads = threads
+    so.inter_op_num_threads = 1
+
+    opt = os.path.join(path, "model.opt.onnx")
+    src = opt
+    if not os.path.exists(opt):
+        src = os.path.join(path, "model.onnx")
+        so.optimized_model_filepath = opt
+        so.add_session_config_entry("session.optimized_model_external_initializers_file_name",
+                                    "model.opt.onnx.data")
+        so.add_session_config_entry("session.optimized_model_external_initializers_min_size_in_bytes",
+                                    "1024")
+    return ort.InferenceSession(src, so, providers=["CPUExecutionProvider"])
+
+
+class _ONNXModel:
+    """export 캐시 로드 + 길이순 배치 + IO binding 실행 (sbert / ce 공용)"""
+
+    def __init__(self, model_path: str, kind: str, batch_size: int = BATCH_SIZE):
+        from transformers import AutoTokenizer
+        self.model_path = model_path
+        self.path = export_onnx(model_path, kind)
+        self.meta = json.load(open(os.path.join(self.path, "meta.json"), encoding="utf-8"))
+        self.tokenizer = AutoTokenizer.from_pretrained(self.path)
+        self.batch_size = batch_size
+        self._sess, self._pid = None, None
+        self._lock = threading.Lock()
+
+    def session(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._sess, self._pid = _create_session(self.path), os.getpid()
+        return self._sess
+
+    def _run(self, feeds) -> np.ndarray:
+        sess = self.session()
+        binding = sess.io_binding()
+        for name in self.meta["inputs"]:
+            binding.bind_cpu_input(name, np.ascontiguousarray(feeds[name], dtype=np.int64))
+        binding.bind_output(self.meta["output"], "cpu")
+        sess.run_with_iobinding(binding)
+        return binding.copy_outputs_to_cpu()[0]
+
+    def run(self, first: List[str], second: List[str] | None = None) -> np.ndarray:
+        n = len(first)
+        # 길이순 정렬로 배치 내 패딩 최소화 (sentence-transformers 와 같은 방식) → 원래 순서로 복원
+        lens = [len(a) + (len(second[i]) if second else 0) for i, a in enumerate(first)]
+        order = np.argsort(lens, kind="stable")
+        outs = []
+        for s in range(0, n, self.batch_size):
+            idx = order[s:s + self.batch_size]
+            enc = self.tokenizer(
+                [first[i] for i in idx], [second[i] for i in idx] if second else None,
+                padding=True, truncation=True, max_length=self.meta["max_length"], return_tensors="np",
+            )
+            outs.append(self._run(enc))
+        res = np.concatenate(outs)
+        inv = np.empty_like(order)
+        inv[order] = np.arange(n)
+        return res[inv]
+
+
+# -------------------- Backends --------------------
+class ONNXSBERTBackend(EmbeddingBackend):
+    """SBERTBackend 와 같은 출력(정규화된 float32 임베딩)을 ONNX Runtime 으로 계산"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.model = _ONNXModel(model_path, "sbert")
+
+    def fit(self, texts):  # 학습 불필요
+        pass
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.model.run(texts).astype(np.float32, copy=False)
+
+
+class ONNXCrossEncoder:
+    """CrossEncoder.predict(pairs) 와 같은 점수(라벨 1개면 sigmoid 확률)를 ONNX Runtime 으로 계산"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.model = _ONNXModel(model_path, "ce")
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        if not len(pairs):
+            return np.zeros(0, dtype=np.float32)
+        return self.model.run([str(a) for a, _ in pairs], [str(b) for _, b in pairs])
@@ -0,0 +1,1005 @@
+"""
+Modeling.ipynb 의 다단계 추천 함수들을 스크립트에서 재사용할 수 있도록 모듈화.
+(scripts/recommend.py, scripts/eval/eval.py, scripts/data_prep/*.py 에서 `from pipeline import ...`)
+
+BM25 → SBERT Dense → Cross-Encoder 재랭킹 → 추출형 추천 사유
+"""
+import os
+import re
+import html
+import json
+import math
+import pickle
+import hashlib
+import time
+import logging
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+from response_cache import ResponseCache
+
+logger = logging.getLogger("Pipeline")
+
+# -------------------- Config --------------------
+SBERT_MODEL_NAME_OR_PATH = os.getenv("SBERT_ID", "models/paraphrase-multilingual-MiniLM-L12-v2")
+CE_MODEL = os.getenv("CE_ID", "models/bge-reranker-v2-m3")
+USE_SBERT = True
+USE_CE = True
+# 추론 백엔드: "torch"(sentence-transformers) | "onnx"(onnx_backend.py, 실패 시 torch 로 폴백)
+BACKEND = os.getenv("BACKEND", "torch").lower()
+
+TOPN_BM25 = 200   # BM25 1차 후보
+M_DENSE   = 60    # Dense 재스코어 후 유지
+L_CE      = 15    # Cross-Encoder 재랭킹 대상
+K_FINAL   = 5     # 최종 Top-K (3~5 권장)
+
+ALPHA = 0.35   # BM25 비중
+BETA  = 0.65   # Dense 비중
+GAMMA = 0.55   # (BM25+Dense) vs CE 비중
+
+FIELD_WEIGHTS = {"title": 2.0, "keywords": 1.6, "description": 1.0, "org": 0.6, "doi": 0.2}
+
+W_LANG = 0.6   # q* = normalize(W_LANG*q_ko + (1-W_LANG)*q_en)
+
+MAX_REASON_CHARS = 100
+
+# Clarify 와 검색 겹쳐 실행 시: Clarify 대기 한도(초) / 동시 Clarify 스레드 수
+CLARIFY_DEADLINE_S = float(os.getenv("CLARIFY_DEADLINE_S", "3.0"))
+CLARIFY_WORKERS = int(os.getenv("CLARIFY_WORKERS", "2"))
+
+# 응답 캐시: 동일 입력(정규화) + 동일 인덱스 버전이면 전체 결과 재사용
+USE_RESPONSE_CACHE = True
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB")  # 예: cache/responses.sqlite (워커 간 공유)
+
+# 근사 중복 매핑 (src/Preprocessing/dedup_dataon.py 출력). 있으면 load_df 가 비대표 레코드 제외, "" 이면 끔
+DEDUP_MAP = os.getenv("DEDUP_MAP", "dataon_dedup_map.jsonl")
+
+
+# -------------------- Utils --------------------
+def safe_text(x) -> str:
+    if x is None or (not isinstance(x, (list, tuple, np.ndarray)) and pd.isna(x)):
+        return ""
+    return str(x)
+
+_rx = re.compile(r"[가-힣A-Za-z0-9]+")
+def lite_tokens(s: str) -> List[str]:
+    return [t.lower() for t in _rx.findall(s or "") if len(t) > 1]
+
+def robust_minmax(x: np.ndarray, lo=5, hi=95) -> np.ndarray:
+    if len(x) == 0:
+        return x
+    a, b = np.percentile(x, lo), np.percentile(x, hi)
+    denom = max(1e-6, b - a)
+    return np.clip((x - a) / denom, 0, 1)
+
+def load_dedup_drop_urls(path: str) -> set:
+    """dedup_dataon.py 매핑 → 비대표(근사 중복) 레코드 url 집합 (대표 레코드와 url 이 같으면 유지)"""
+    drop, keep = set(), set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            obj = json.loads(line)
+            url = obj.get("url")
+            if url:
+                (keep if obj.get("rep") else drop).add(url)
+    return drop - keep
+
+def load_df(csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    # 아주 간단한 안전장치
+    df = df.rename(columns={c: c.lower() for c in df.columns})
+    for col in ["title", "description", "url"]:
+        if col not in df.columns:
+            df[col] = ""
+    # 근사 중복 매핑이 있으면 비대표 레코드 제외 → 캐시 구축 / 서빙이 같은 코퍼스(지문)를 봄
+    if DEDUP_MAP and os.path.exists(DEDUP_MAP):
+        drop = load_dedup_drop_urls(DEDUP_MAP)
+        dup = df["url"].isin(drop)
+        if dup.any():
+            logger.info("%s: 근사 중복 %d건 제외 (%s)", csv_path, int(dup.sum()), DEDUP_MAP)
+            df = df[~dup].reset_index(drop=True)
+    return df
+
+
+# -------------------- Embedding backends --------------------
+class EmbeddingBackend:
+    def fit(self, texts: List[str]): ...
+    def encode(self, texts: List[str]): ...
+
+class SBERTBackend(EmbeddingBackend):
+    def __init__(self, model_path: str):
+        from sentence_transformers import SentenceTransformer
+        self.model_path = model_path
+        self.model = SentenceTransformer(model_path)
+
+    def fit(self, texts):  # SBERT는 학습 필요 없음
+        pass
+
+    def encode(self, texts):
+        vecs = self.model.encode(
+            texts,
+            batch_size=32,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return vecs
+
+def get_backend():
+    if USE_SBERT:
+        if BACKEND == "onnx":
+            try:
+                from onnx_backend import ONNXSBERTBackend
+                return ONNXSBERTBackend(SBERT_MODEL_NAME_OR_PATH)
+            except Exception as e:
+                logger.warning("ONNX SBERT backend unavailable, falling back to PyTorch: %r", e)
+        return SBERTBackend(SBERT_MODEL_NAME_OR_PATH)
+
+
+# -------------------- BM25 / Dense --------------------
+def bm25_raw_idf(df: List[int], n: int) -> List[float]:
+    return [math.log(n - f + 0.5) - math.log(f + 0.5) for f in df]
+
+def bm25_eps_idf(raw_idf: List[float], epsilon: float) -> float:
+    """음수 idf 대체값 = epsilon * 평균 idf (어휘 순서대로 순차 합)"""
+    return epsilon * (sum(raw_idf) / len(raw_idf)) if raw_idf else 0.0
+
+def bm25_idf(df: List[int], n: int, epsilon: float, eps_idf: float | None = None) -> np.ndarray:
+    """
+    BM25Okapi 와 같은 연산 순서(math.log, 순차 합)로 계산해 점수가 비트 단위로 일치.
+    eps_idf 를 주면 (샤드처럼 어휘 일부만 가진 경우) 전역 평균 기준 대체값을 그대로 사용.
+    """
+    idf = bm25_raw_idf(df, n)
+    if idf:
+        eps = bm25_eps_idf(idf, epsilon) if eps_idf is None else eps_idf
+        idf = [eps if v < 0 else v for v in idf]
+    return np.asarray(idf, dtype=np.float64)
+
+
+class FieldBM25:
+    """
+    단일 필드 BM25 (rank_bm25.BM25Okapi 와 동일한 idf/점수식).
+    문서별 dict 대신 CSR 형태의 역색인(term → doc_ids, tf)을 numpy 배열로 보관해
+    질의 토큰마다 전체 문서를 파이썬 루프로 훑지 않고 posting 만 벡터 연산으로 누적
+    → 채점 구간이 GIL 을 거의 잡지 않아 여러 스레드가 동시에 질의 가능.
+    """
+    def __init__(self, docs: List[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1, self.b, self.epsilon = k1, b, epsilon
+        self.corpus_size = len(docs)
+        self.doc_len = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+        self.avgdl = float(self.doc_len.sum()) / max(1, self.corpus_size)
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for i, doc in enumerate(docs):
+            tf: Dict[str, int] = {}
+            for t in doc:
+                tf[t] = tf.get(t, 0) + 1
+            for t, c in tf.items():
+                ids, tfs = postings.setdefault(t, ([], []))
+                ids.append(i); tfs.append(c)
+
+        self.vocab = {t: j for j, t in enumerate(postings)}
+        self.indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(ids) for ids, _ in postings.values()])
+        self.doc_ids = np.fromiter((i for ids, _ in postings.values() for i in ids),
+                                   dtype=np.int32, count=int(self.indptr[-1]))
+        self.tfs = np.fromiter((c for _, tfs in postings.values() for c in tfs),
+                               dtype=np.float64, count=int(self.indptr[-1]))
+        self.idf = self._calc_idf(np.diff(self.indptr))
+        self.norm = self.k1 * (1 - self.b + self.b * self.doc_len / self.avgdl)
+        for arr in (self.doc_len, self.indptr, self.doc_ids, self.tfs, self.idf, self.norm):
+            arr.setflags(write=False)
+
+    def _calc_idf(self, df: np.ndarray) -> np.ndarray:
+        return bm25_idf(df.tolist(), self.corpus_size, self.epsilon)
+
+    def apply_global_stats(self, n_docs: int, avgdl: float, df: List[int], eps_idf: float):
+        """샤드용: 전체 코퍼스 기준 문서 수/평균 길이/문서 빈도로 idf·정규화 항을 다시 계산"""
+        self.avgdl = avgdl
+        self.idf = bm25_idf(df, n_docs, self.epsilon, eps_idf=eps_idf)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.norm = self.k1 * (1 - self.b + self.b * self.doc_len / avgdl)
+        self.idf.setflags(write=False); self.norm.setflags(write=False)
+
+    def postings(self, token: str):
+        j = self.vocab.get(token)
+        if j is None:
+            return None
+        lo, hi = self.indptr[j], self.indptr[j + 1]
+        return j, self.doc_ids[lo:hi], self.tfs[lo:hi]
+
+    def get_scores(self, query_tokens: List[str], partial: np.ndarray | None = None,
+                   docs: "DocSelection | None" = None) -> np.ndarray:
+        """
+        partial: 앞선 토큰들의 누적 점수 → 이어서 더하면 전체 토큰으로 한 번에 계산한 것과 동일
+        docs: facet 필터 결과. 주면 posting 과 선택 문서의 교집합만 계산해 len(docs) 길이로 반환
+              (값은 전체 점수의 [docs.ids] 와 동일, 작은 선택이면 비용은 min(posting 길이, 선택 문서 수)에 비례)
+        """
+        if docs is not None and docs.dense:
+            # 선택 문서가 많으면 이진 탐색보다 전체 점수 후 [docs.ids] 가 더 빠름 (값은 동일)
+            full = np.zeros(self.corpus_size)
+            if partial is not None:
+                full[docs.ids] = partial
+            return self.get_scores(query_tokens, full)[docs.ids]
+        n = self.corpus_size if docs is None else len(docs)
+        scores = np.zeros(n) if partial is None else partial.copy()
+        for q in query_tokens:
+            hit = self.postings(q)
+            if hit is None:
+                continue
+            j, ids, tf = hit
+            out = ids
+            if docs is not None:
+                # posting(doc id 오름차순) ∩ 선택 문서 → 선택된 posting 만 채점
+                keep, out = docs.locate(ids)
+                ids, tf = ids[keep], tf[keep]
+            scores[out] += self.idf[j] * (tf * (self.k1 + 1) / (tf + self.norm[ids]))
+        return scores
+
+
+class WeightedBM25:
+    """각 필드별 BM25를 만들고 가중합으로 점수를 계산"""
+    def __init__(self, df: pd.DataFrame, fields: Dict[str, float], keep_empty: bool = False):
+        """keep_empty: 토큰이 없는 필드도 유지 (샤드별로 비어 있어도 전역 필드 구성을 맞추기 위함)"""
+        self.fields = {}
+        for f, w in fields.items():
+            if f in df.columns:
+                docs = [lite_tokens(safe_text(x)) for x in df[f].fillna("").astype(str).tolist()]
+                if keep_empty or sum(len(d) for d in docs) > 0:
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        self.fields[f] = (FieldBM25(docs), w)
+        self.n_docs = len(df)
+
+    def score(self, query_tokens: List[str]) -> np.ndarray:
+        return self.combine(self.field_scores(query_tokens))
+
+    def field_scores(self, query_tokens: List[str],
+                     partial: Dict[str, np.ndarray] | None = None,
+                     docs: "DocSelection | None" = None) -> Dict[str, np.ndarray]:
+        """필드별 누적 점수. partial(이전 토큰 결과)에 이어서 계산 가능 → 한/영 토큰을 나눠 처리"""
+        return {f: bm25.get_scores(query_tokens, None if partial is None else partial[f], docs)
+                for f, (bm25, _) in self.fields.items()}
+
+    def combine(self, field_scores: Dict[str, np.ndarray], docs: "DocSelection | None" = None) -> np.ndarray:
+        scores = np.zeros(self.n_docs if docs is None else len(docs), dtype=float)
+        for f, (_, w) in self.fields.items():
+            scores += w * field_scores[f]
+        return scores
+
+def compose_dense_text(row: pd.Series) -> str:
+    # title [SEP] top-8 keywords [SEP] short_desc(최대 300자)
+    title = safe_text(row.get("title", ""))
+    kws   = row.get("keywords", "")
+    if isinstance(kws, list): kws = ", ".join(safe_text(k) for k in kws if k)
+    kws   = safe_text(kws)
+    kws = ", ".join(kws.split(",")[:8])
+    desc  = safe_text(row.get("description", ""))[:300]
+    return f"{title} [SEP] {kws} [SEP] {desc}".strip()
+
+def dense_texts(df: pd.DataFrame) -> List[str]:
+    if "__dense_text__" in df.columns:
+        return df["__dense_text__"].tolist()
+    return [compose_dense_text(r) for _, r in df.iterrows()]
+
+def build_dense_matrix(df: pd.DataFrame, backend) -> Tuple[List[str], np.ndarray]:
+    texts = [compose_dense_text(r) for _, r in df.iterrows()]
+    vecs  = backend.encode(texts)  # SBERTBackend.normalize_embeddings=True 권장
+    return texts, vecs
+
+def combine_query_vec(backend, ko_query: str, en_query: str | None,
+                      q_ko: np.ndarray | None = None) -> np.ndarray:
+    if q_ko is None:
+        q_ko = backend.encode([ko_query])[0]
+    if en_query:
+        q_en = backend.encode([en_query])[0]
+        q = W_LANG * q_ko + (1 - W_LANG) * q_en
+        q = q / (np.linalg.norm(q) + 1e-12)
+        return q
+    return q_ko
+
+
+# -------------------- Cross-Encoder --------------------
+_ce_model_cache = None
+_CE_LOCK = threading.Lock()
+def get_cross_encoder():
+    global _ce_model_cache
+    model = _ce_model_cache
+    if model is None:
+        # 동시 첫 호출 시 한 스레드만 로드 (나머지는 대기 후 같은 모델 공유)
+        with _CE_LOCK:
+            if _ce_model_cache is None:
+                _ce_model_cache = _load_cross_encoder()
+            model = _ce_model_cache
+    return model
+
+def ce_predict_pairs(pairs: List[Tuple[str, str]]) -> np.ndarray:
+    if not USE_CE:
+        return np.zeros(len(pairs), dtype=float)
+    return get_cross_encoder().predict(pairs)
+
+def _load_cross_encoder():
+    if BACKEND == "onnx":
+        try:
+            from onnx_backend import ONNXCrossEncoder
+            return ONNXCrossEncoder(CE_MODEL)
+        except Exception as e:
+            logger.warning("ONNX cross-encoder unavailable, falling back to PyTorch: %r", e)
+
+    from sentence_transformers import CrossEncoder
+    import torch
+    dev = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _load(model_kwargs=None):
+        return CrossEncoder(
+            CE_MODEL, device=dev, max_length=512,
+            **({"model_kwargs": model_kwargs} if model_kwargs else {})
+        )
+
+    try:
+        # 1) SDPA 시도 (가능하면 속도 이점)
+        return _load({"attn_implementation": "sdpa"})
+    except Exception:
+        # 2) SDPA 미지원 시 eager로 폴백
+        return _load({"attn_implementation": "eager"})
+
+
+# -------------------- 추출형 추천 사유 --------------------
+_rx_split = re.compile(r"(?<=[.!?。？！])\s+|[\r\n]+|[•\u2022]")
+
+def extractive_reason(q_title: str, q_desc: str,
+                      doc_title: str, doc_desc: str,
+                      backend, max_chars: int = MAX_REASON_CHARS) -> str:
+    """입력(제목+설명)과 후보 설명을 비교해 유사도가 가장 큰 문장 1개를 반환"""
+    raw = (doc_desc or "").strip() or (doc_title or "")
+    cands = [s.strip() for s in _rx_split.split(raw) if s and len(s.strip()) > 2]
+    cands = cands[:5]  # 너무 많은 문장 비교 방지 (속도)
+    if not cands:
+        s = (doc_title or "").strip()
+        return tidy_korean_sentence(s, max_chars)
+
+    # 쿼리/문장 임베딩
+    q_text = f"{(q_title or '').strip()} {(q_desc or '').strip()}".strip()
+    qv = backend.encode([q_text])
+    sv = backend.encode(cands)
+
+    # 코사인 유사도 (정규화 임베딩 가정 → 내적 사용, 실패 시 fallback)
+    try:
+        from scipy import sparse as _sp
+        if hasattr(qv, "shape") and len(getattr(qv, "shape", [])) == 1:
+            qv = qv.reshape(1, -1)
+        sims = (qv @ (sv.T if not _sp.issparse(sv) else sv.T)).toarray().ravel() \
+               if _sp.issparse(sv) else (qv @ sv.T).ravel()
+    except Exception:
+        sims = cosine_similarity(qv, sv)[0]
+
+    # 최댓값부터 후보 인덱스 정렬
+    order = list(np.argsort(-sims))
+    best = None
+
+    for idx in order[:3]:  # 최상위 3개 중에서 너무 겹치지 않는 문장 선택
+        cand = cands[int(idx)]
+        para = _light_paraphrase_ko(cand)
+        # 원문과 너무 비슷하면(겹침률 0.95↑) 다음 후보 시도
+        if _overlap_ratio(para, cand) >= 0.95:
+            continue
+        best = para
+        break
+
+    if best is None:
+        # 전부 비슷하면 최상위 문장만 가볍게 손질
+        best = _light_paraphrase_ko(cands[int(order[0])])
+
+    best = re.sub(r"\s+", " ", best).strip()
+    return tidy_korean_sentence(best, max_chars)
+
+# ==== 한국어 문장 정리(맞춤법/문장부호 최소 정돈) ====
+_rx_multi_space = re.compile(r"\s+")
+def tidy_korean_sentence(text: str, max_chars: int = 100) -> str:
+    t = html.unescape(text or "")                 # &#x00B7; 등 HTML 엔티티 해제
+    t = unicodedata.normalize("NFKC", t)          # 전각/호환 문자 정규화
+
+    # 불필요한 제로폭/제어문자 제거
+    t = re.sub(r"[\u200B-\u200D\uFEFF]", "", t)
+
+    # 괄호 안/앞뒤 공백 정리
+    t = re.sub(r"\(\s+", "(", t)
+    t = re.sub(r"\s+\)", ")", t)
+
+    # 구두점 앞 공백 제거, 뒤는 한 칸
+    t = re.sub(r"\s+([,\.!?;:)\]])", r"\1", t)
+    t = re.sub(r"([,;:])(?=\S)", r"\1 ", t)
+
+    # , . 순서/중복 구두점 정리
+    t = re.sub(r",\s*\.", ".", t)
+    t = re.sub(r"\.\s*,", ".", t)
+    t = re.sub(r"([\.!?,])\1+", r"\1", t)
+
+    # 리스트 점/기호류 가볍게 교정
+    t = t.replace("•", "·").replace("・", "·")
+    t = re.sub(r"\s*·\s*", "·", t)
+
+    # 다중 공백 정리
+    t = _rx_multi_space.sub(" ", t).strip()
+
+    # 길이 제한 및 종결 보정
+    t = t[:max_chars].rstrip()
+    if not t.endswith(("다", "요", "임", "함", ".", "!", "?")):
+        t += "."
+
+    return t
+
+# (), [], {}, <>, 〈〉, 《》, 「」, 『』, 【】, 〔〕 등 1층 괄호 블록 제거
+_rx_paren_any = re.compile(r"\s*[\(\[\{<〈《「『【〔]\s*[^)\]\}>〉》」』】〕]{0,200}\s*[\)\]\}>〉》」』】〕]\s*")
+
+def drop_paren_glue(s: str) -> str:
+    """괄호 안 문구를 모두 제거하고 공백/구두점 정리"""
+    if not s:
+        return ""
+    t = str(s)
+
+    # 중첩 괄호 대비: 더 이상 치환이 안 될 때까지 반복
+    prev = None
+    while prev != t:
+        prev = t
+        t = _rx_paren_any.sub(" ", t)
+
+    # 공백 뭉침/구두점 주변 공백 정리
+    t = re.sub(r"\s+", " ", t)
+    t = re.sub(r"\s+([,\.!?;:])", r"\1", t)   # 구두점 앞 공백 제거
+    t = re.sub(r"([,;:])(?=\S)", r"\1 ", t)   # 구두점 뒤 한 칸
+    return t.strip()
+
+# 흔한 서두/표현 치환(아주 보수적)
+_REP = [
+    (r"^(본\s*연구|이\s*연구|본\s*논문|이\s*논문|본\s*문서|이\s*문서)\s*(는|에서는)\s*", ""),  # 서두 삭제
+    (r"다룬다", "분석한다"),
+    (r"보여준다", "확인했다"),
+    (r"제시한다", "제안한다"),
+    (r"탐구한다", "살핀다"),
+    (r"효과를\s*보였다", "효과를 확인했다"),
+    (r"\s*·\s*", "·"),
+]
+def _light_paraphrase_ko(s: str) -> str:
+    t = drop_paren_glue(s)
+    for p, r in _REP:
+        t = re.sub(p, r, t)
+    t = re.sub(r"\s+", " ", t).strip()
+    return t
+
+_rx_overlap_tok = re.compile(r"[가-힣A-Za-z0-9]+")
+def _overlap_ratio(a: str, b: str) -> float:
+    # 토큰 겹침 비율(간단 자카드) – 너무 같으면 다른 문장/치환 시도
+    tok = lambda x: set(w for w in _rx_overlap_tok.findall(x.lower()) if len(w) > 1)
+    ta, tb = tok(a), tok(b)
+    return (len(ta & tb) / max(1, len(ta))) if ta else 0.0
+
+
+# ==== Retrieval index / Pipeline ====
+# -------------------- Facets (연도/기관/언어 필터) --------------------
+FACET_FIELDS = ("year", "org", "lang")
+DENSE_SELECTION_RATIO = 4   # 선택 문서가 전체의 1/4 이상이면 전체 점수 후 부분 추출
+_rx_year = re.compile(r"(\d{4})")
+
+def _facet_key(facet: str, value):
+    if value is None or (not isinstance(value, (list, tuple, np.ndarray)) and pd.isna(value)):
+        return None
+    if facet == "year":
+        m = _rx_year.search(str(value))
+        return int(m.group(1)) if m else None
+    value = str(value).strip().casefold()
+    return value or None
+
+def normalize_filters(filters: dict | None) -> dict | None:
+    """
+    {"year_min": 2020, "year_max": 2023, "org": "KISTI" | [...], "lang": "ko" | [...]}
+    → 정규화된 dict (응답 캐시 키에도 사용). 조건이 없으면 None.
+    """
+    if not filters:
+        return None
+    unknown = set(filters) - {"year_min", "year_max", "org", "lang"}
+    if unknown:
+        raise ValueError(f"unknown filter keys: {sorted(unknown)}")
+    out = {}
+    for k in ("year_min", "year_max"):
+        if filters.get(k) is not None:
+            out[k] = int(filters[k])
+    for k in ("org", "lang"):
+        v = filters.get(k)
+        if v is None or v == "" or v == []:
+            continue
+        vals = [v] if isinstance(v, str) else list(v)
+        out[k] = sorted({_facet_key(k, x) for x in vals} - {None})
+    return out or None
+
+
+class DocSelection:
+    """
+    필터를 통과한 문서 id (오름차순 int32).
+    선택 문서가 전체의 1/DENSE_SELECTION_RATIO 미만이면 posting 과 선택 id 를 이진 탐색으로 교차(sparse),
+    그 이상이면 전체 점수 계산 후 [ids] (dense) → 필터 질의 비용이 필터 없는 질의를 넘지 않음
+    """
+    def __init__(self, ids: np.ndarray, n_docs: int):
+        self.ids = ids
+        self.dense = len(ids) * DENSE_SELECTION_RATIO >= n_docs
+
+    def __len__(self):
+        return len(self.ids)
+
+    def locate(self, doc_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        오름차순 posting doc id → (선택에 포함된 posting 의 위치, 그 문서의 선택 배열 내 위치).
+        posting 과 선택 중 짧은 쪽을 긴 쪽에서 이진 탐색 (작은 선택이면 선택 문서 수만큼만 탐색)
+        """
+        ids = self.ids
+        if not len(ids) or not len(doc_ids):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        if len(doc_ids) <= len(ids):
+            pos = np.searchsorted(ids, doc_ids)
+            keep = ids[np.minimum(pos, len(ids) - 1)] == doc_ids
+            return np.flatnonzero(keep), pos[keep]
+        at = np.searchsorted(doc_ids, ids)
+        keep = doc_ids[np.minimum(at, len(doc_ids) - 1)] == ids
+        return at[keep], np.flatnonzero(keep)
+
+
+class FacetIndex:
+    """
+    facet 값별 문서 집합 (인덱스 구축 시 1회 계산)
+    - sets[facet][value]: 정렬된 int32 id 배열
+    - codes[facet]: 문서 → 값 코드 (int32, 값 없음 = len(values))
+    필터 = facet 내 값들은 OR, facet 사이는 AND:
+    문서 수가 가장 적은 facet 조건만 id 배열로 합치고, 나머지 조건은 그 id 들의 코드만 조회해 거름
+    → 필터 비용은 가장 좁은 조건의 문서 수에 비례, 전체 N 길이 마스크를 만들지 않음.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.n_docs = len(df)
+        self.sets: Dict[str, Dict] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for facet in FACET_FIELDS:
+            table = {}
+            codes = np.zeros(self.n_docs, dtype=np.int32)
+            if facet in df.columns:
+                keys = pd.Series([_facet_key(facet, v) for v in df[facet].tolist()], dtype=object)
+                codes, uniques = pd.factorize(keys)
+                codes = np.where(codes < 0, len(uniques), codes).astype(np.int32)
+                order = np.argsort(codes, kind="stable")
+                bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+                for c, value in enumerate(uniques):
+                    ids = order[bounds[c]:bounds[c + 1]].astype(np.int32)
+                    ids.setflags(write=False)
+                    table[value] = ids
+            codes.setflags(write=False)
+            self.sets[facet] = table
+            self.codes[facet] = codes
+
+    def _union(self, facet: str, values) -> np.ndarray:
+        parts = [self.sets[facet][v] for v in values]
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))  # 같은 facet 의 값별 집합은 서로소
+
+    def _allowed(self, facet: str, values) -> np.ndarray:
+        """값 코드 → 허용 여부 (마지막 칸 = 값 없음, 항상 제외)"""
+        table = self.sets[facet]
+        lut = np.zeros(len(table) + 1, dtype=bool)
+        lut[[i for i, v in enumerate(table) if v in values]] = True
+        return lut
+
+    def select(self, filters: dict | None) -> DocSelection | None:
+        """정규화된 필터 → DocSelection (필터 없으면 None = 전체 문서)"""
+        if not filters:
+            return None
+        groups = []
+        if "year_min" in filters or "year_max" in filters:
+            lo, hi = filters.get("year_min", -10**9), filters.get("year_max", 10**9)
+            groups.append(("year", {y for y in self.sets["year"] if lo <= y <= hi}))
+        for facet in ("org", "lang"):
+            if facet in filters:
+                groups.append((facet, {v for v in filters[facet] if v in self.sets[facet]}))
+        groups.sort(key=lambda g: sum(len(self.sets[g[0]][v]) for v in g[1]))
+        ids = self._union(*groups[0])
+        for facet, values in groups[1:]:
+            ids = ids[self._allowed(facet, values)[self.codes[facet][ids]]]
+        return DocSelection(ids, self.n_docs)
+
+
+@dataclass(frozen=True)
+class RetrievalIndex:
+    """
+    BM25 인덱스 + Dense 텍스트/임베딩 묶음 (구축 후 변경 불가).
+    임베딩 배열은 읽기 전용으로 고정 → 여러 스레드가 잠금 없이 공유 가능.
+    """
+    bm25_p: WeightedBM25
+    bm25_d: WeightedBM25
+    p_texts: List[str]
+    d_texts: List[str]
+    p_vecs: np.ndarray
+    d_vecs: np.ndarray
+    version: str
+    facets_p: FacetIndex
+    facets_d: FacetIndex
+
+    @classmethod
+    def build(cls, papers_df: pd.DataFrame, datasets_df: pd.DataFrame, backend) -> "RetrievalIndex":
+        p_texts, d_texts = dense_texts(papers_df), dense_texts(datasets_df)
+        p_vecs, d_vecs = np.asarray(backend.encode(p_texts)), np.asarray(backend.encode(d_texts))
+        p_vecs.setflags(write=False); d_vecs.setflags(write=False)
+        return cls(
+            bm25_p=WeightedBM25(papers_df, FIELD_WEIGHTS),
+            bm25_d=WeightedBM25(datasets_df, FIELD_WEIGHTS),
+            p_texts=p_texts, d_texts=d_texts,
+            p_vecs=p_vecs, d_vecs=d_vecs,
+            version=_compute_index_version(papers_df, datasets_df, backend),
+            facets_p=FacetIndex(papers_df), facets_d=FacetIndex(datasets_df),
+        )
+
+    @classmethod
+    def load(cls, papers_df: pd.DataFrame, datasets_df: pd.DataFrame, backend,
+             cache_dir: str = "cache", mmap: bool = True) -> "RetrievalIndex":
+        """
+        scripts/data_prep/build_cache.py 산출물(cache/{papers,datasets}.*)에서 인덱스 로드.
+        mmap=True 면 임베딩을 np.load(mmap_mode="r")로 열어 파일 페이지를 여러 프로세스가 공유.
+        캐시가 없거나, 캐시를 만든 코퍼스 지문 / 임베딩 백엔드({name}.meta.json)가 현재와 다르면 build()로 새로 구축.
+        """
+        parts = {}
+        for name, df in (("papers", papers_df), ("datasets", datasets_df)):
+            base = os.path.join(cache_dir, name)
+            paths = [f"{base}.bm25.pkl", f"{base}.dense.npy", f"{base}.texts.json", f"{base}.meta.json"]
+            if not all(os.path.exists(x) for x in paths):
+                logger.warning("index cache %s.* missing or incomplete → rebuilding", base)
+                return cls.build(papers_df, datasets_df, backend)
+            with open(paths[3], encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") != _corpus_fingerprint(df):
+                logger.warning("index cache %s.* was built from a different corpus → rebuilding", base)
+                return cls.build(papers_df, datasets_df, backend)
+            if meta.get("backend", _backend_tag(backend)) != _backend_tag(backend):
+                logger.warning("index cache %s.* was embedded with %s, not %s → rebuilding",
+                               base, meta["backend"], _backend_tag(backend))
+                return cls.build(papers_df, datasets_df, backend)
+            with open(paths[0], "rb") as f:
+                bm25 = pickle.load(f)
+            vecs = np.load(paths[1], mmap_mode="r" if mmap else None)
+            with open(paths[2], encoding="utf-8") as f:
+                texts = json.load(f)
+            if not (bm25.n_docs == len(vecs) == len(texts) == len(df)):
+                logger.warning("index cache %s.* row counts do not match → rebuilding", base)
+                return cls.build(papers_df, datasets_df, backend)
+            parts[name] = (bm25, texts, vecs)
+
+        (bm25_p, p_texts, p_vecs), (bm25_d, d_texts, d_vecs) = parts["papers"], parts["datasets"]
+        return cls(
+            bm25_p=bm25_p, bm25_d=bm25_d,
+            p_texts=p_texts, d_texts=d_texts,
+            p_vecs=p_vecs, d_vecs=d_vecs,
+            version=_compute_index_version(papers_df, datasets_df, backend),
+            facets_p=FacetIndex(papers_df), facets_d=FacetIndex(datasets_df),
+        )
+
+
+_INDEX: RetrievalIndex | None = None
+_INDEX_LOCK = threading.Lock()
+_RESPONSE_CACHE = None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# 인덱스가 읽는 모든 컬럼 (BM25 필드, Dense 텍스트, 응답 컬럼, facet)
+_FINGERPRINT_COLS = tuple(dict.fromkeys(["title", "description", "url", "keywords", *FIELD_WEIGHTS, *FACET_FIELDS]))
+
+def _corpus_fingerprint(df: pd.DataFrame) -> str:
+    cols = [c for c in _FINGERPRINT_COLS if c in df.columns]
+    h = pd.util.hash_pandas_object(df[cols].fillna("").astype(str), index=False)
+    return f"{len(df)}:{hashlib.sha1(h.to_numpy().tobytes()).hexdigest()}"
+
+def _backend_tag(backend) -> str:
+    return f"{type(backend).__name__}:{getattr(backend, 'model_path', '')}"
+
+def _compute_index_version(papers_df, datasets_df, backend) -> str:
+    """코퍼스 내용 + 모델/가중치 설정 지문 → 프로세스가 달라도 같은 인덱스면 같은 값"""
+    parts = [
+        _corpus_fingerprint(papers_df), _corpus_fingerprint(datasets_df),
+        # 같은 모델이라도 PyTorch / ONNX 출력은 미세하게 다르므로 백엔드 종류도 포함
+        _backend_tag(backend),
+        f"{CE_MODEL}:{BACKEND}" if USE_CE else "no-ce",
+        repr((TOPN_BM25, M_DENSE, L_CE, ALPHA, BETA, GAMMA, W_LANG, sorted(FIELD_WEIGHTS.items()))),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def get_retrieval_index(papers_df, datasets_df, backend) -> RetrievalIndex:
+    """프로세스 전역 인덱스를 1회만 구축 (동시 호출 시 한 스레드만 구축, 나머지는 대기 후 공유)"""
+    global _INDEX
+    index = _INDEX
+    if index is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = RetrievalIndex.build(papers_df, datasets_df, backend)
+            index = _INDEX
+    return index
+
+def _ensure_indexes_and_dense(papers_df, datasets_df, backend) -> RetrievalIndex:
+    """세션 동안 1회만 구축해서 재사용 (노트북 호환용 이름)"""
+    return get_retrieval_index(papers_df, datasets_df, backend)
+
+def reset_retrieval_cache():
+    """코퍼스를 바꾸면 호출해서 캐시 초기화 (인덱스 버전도 재계산 → 이전 응답 캐시 무효화)"""
+    global _INDEX
+    with _INDEX_LOCK:
+        _INDEX = None
+    if _RESPONSE_CACHE is not None:
+        _RESPONSE_CACHE.clear()
+
+def get_index_version() -> str | None:
+    index = _INDEX
+    return index.version if index is not None else None
+
+def get_response_cache() -> ResponseCache:
+    """프로세스 내 LRU + (옵션) RESPONSE_CACHE_DB 디스크 캐시"""
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        with _RESPONSE_CACHE_LOCK:
+            if _RESPONSE_CACHE is None:
+                _RESPONSE_CACHE = ResponseCache(max_entries=RESPONSE_CACHE_SIZE, db_path=RESPONSE_CACHE_DB)
+    return _RESPONSE_CACHE
+
+
+# -------------------- 후보 재랭킹 --------------------
+def rank_candidates(papers_df: pd.DataFrame, datasets_df: pd.DataFrame, backend,
+                    cand_p: pd.DataFrame, cand_d: pd.DataFrame, text_of,
+                    q_ko: str, q_en: str | None, title_ko: str, desc_ko: str, topk: int) -> pd.DataFrame:
+    """
+    BM25 후보(src, idx, bm25, dense) 이후 단계: Dense 상위 M → 정규화 → CE 재랭킹 → 레벨 → 표.
+    text_of(src, idx) → CE 입력용 문서 텍스트 (단일 인덱스 / 샤드 결과 모두 같은 경로 사용)
+    """
+    if len(cand_p) + len(cand_d) == 0:
+        return pd.DataFrame(columns=["구분", "제목", "설명", "점수", "추천 사유", "Level", "URL"])
+
+    cand   = pd.concat([cand_p, cand_d], ignore_index=True).sort_values("dense", ascending=False)
+    cand   = cand.head(min(M_DENSE, len(cand))).reset_index(drop=True)
+
+    # 2.5) 정규화/기본점수
+    cand["bm25_n"] = robust_minmax(cand["bm25"].to_numpy())
+    cand["dense_n"] = robust_minmax(cand["dense"].to_numpy())
+    cand["s_base"]  = ALPHA * cand["bm25_n"] + BETA * cand["dense_n"]
+
+    # 3) CE 재랭킹
+    cand_L = cand.head(min(L_CE, len(cand))).copy()
+    q_text = q_en if q_en else q_ko
+    pairs = [(q_text, text_of(src, int(i))) for src, i in zip(cand_L["src"], cand_L["idx"])]
+    ce_scores = ce_predict_pairs(pairs) if len(pairs) else np.array([])
+    cand_L["ce"] = ce_scores if len(ce_scores) else 0.0
+
+    # 4) 점수 결합
+    cand["final"] = cand["s_base"].to_numpy()
+    if len(cand_L):
+        cand_L["ce_n"] = robust_minmax(cand_L["ce"].to_numpy())
+        base_vals = cand.loc[cand_L.index, "s_base"].to_numpy()
+        cand.loc[cand_L.index, "final"] = GAMMA * base_vals + (1 - GAMMA) * cand_L["ce_n"].to_numpy()
+
+    # 레벨링
+    base_for_levels = cand.head(min(L_CE, len(cand)))
+    p50, p75, p90 = np.percentile(base_for_levels["final"].to_numpy(), [50, 75, 90])
+    def to_level(x: float) -> str:
+        if x >= p90: return "강추"
+        if x >= p75: return "추천"
+        if x >= p50: return "참고"
+        return "보류"
+    cand["level"] = cand["final"].apply(to_level)
+
+    # 5) Top-K
+    top = cand.sort_values("final", ascending=False).head(min(topk, len(cand))).copy()
+
+    # 6) 표 생성 (추천사유는 초경량 버전 권장)
+    rows = []
+    for _, r in top.iterrows():
+        src, i = r["src"], int(r["idx"])
+        row = (papers_df.iloc[i] if src == "paper" else datasets_df.iloc[i])
+
+        reason = extractive_reason(
+            title_ko, desc_ko,
+            safe_text(row.get("title","")),
+            safe_text(row.get("description","")),
+            backend,
+            max_chars=MAX_REASON_CHARS,
+        )
+
+        rows.append({
+            "구분": "thesis" if src=="paper" else "dataset",
+            "제목": safe_text(row.get("title","")),
+            "설명": safe_text(row.get("description","")),
+            "점수": round(float(r["final"]), 4),
+            "추천 사유": reason,
+            "Level": r.get("level", "참고"),
+            "URL":  safe_text(row.get("url","")),
+        })
+    result = pd.DataFrame(rows)
+    return result
+
+
+@dataclass(frozen=True)
+class _KoreanStage:
+    q_ko: str
+    bm25_p: Dict[str, np.ndarray]
+    bm25_d: Dict[str, np.ndarray]
+    q_vec: np.ndarray
+    filters: dict | None = None
+    docs_p: DocSelection | None = None
+    docs_d: DocSelection | None = None
+
+
+_CLARIFY_POOL = None
+_CLARIFY_POOL_LOCK = threading.Lock()
+# 실행 중(또는 deadline 을 넘겨 아직 안 끝난) Clarify 작업 수 제한: 워커가 모두 차 있으면 큐에 쌓지 않음
+_CLARIFY_SLOTS = threading.BoundedSemaphore(CLARIFY_WORKERS)
+
+def _clarify_pool() -> ThreadPoolExecutor:
+    global _CLARIFY_POOL
+    if _CLARIFY_POOL is None:
+        with _CLARIFY_POOL_LOCK:
+            if _CLARIFY_POOL is None:
+                _CLARIFY_POOL = ThreadPoolExecutor(CLARIFY_WORKERS, thread_name_prefix="clarify")
+    return _CLARIFY_POOL
+
+def _clarify_pair(clarify, title_ko: str, desc_ko: str):
+    en_title = clarify(title_ko) if safe_text(title_ko).strip() else None
+    en_desc = clarify(desc_ko) if safe_text(desc_ko).strip() else None
+    return en_title, en_desc
+
+
+class Pipeline:
+    """
+    코퍼스 + 백엔드 + RetrievalIndex 를 묶은 추천 파이프라인.
+    질의 처리 중에는 공유 상태를 변경하지 않으므로 여러 스레드에서 동시에 recommend() 호출 가능.
+    index 를 넘기지 않으면 처음 필요할 때 잠금 하에 1회 구축.
+    """
+    def __init__(self, papers_df: pd.DataFrame, datasets_df: pd.DataFrame, backend,
+                 index: RetrievalIndex | None = None):
+        self.papers_df = papers_df
+        self.datasets_df = datasets_df
+        self.backend = backend
+        self._index = index
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> RetrievalIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = RetrievalIndex.build(self.papers_df, self.datasets_df, self.backend)
+                index = self._index
+        return index
+
+    def prepare_korean(self, title_ko: str, desc_ko: str, filters: dict | None = None) -> "_KoreanStage":
+        """원문(한국어) 질의만으로 가능한 단계: facet 필터 + BM25 필드별 누적 점수 + 질의 임베딩"""
+        index = self.index
+        filters = normalize_filters(filters)
+        docs_p, docs_d = index.facets_p.select(filters), index.facets_d.select(filters)
+        q_ko = (safe_text(title_ko) + " " + safe_text(desc_ko)).strip()
+        ko_tokens = lite_tokens(q_ko)
+        return _KoreanStage(
+            q_ko=q_ko,
+            bm25_p=index.bm25_p.field_scores(ko_tokens, docs=docs_p),
+            bm25_d=index.bm25_d.field_scores(ko_tokens, docs=docs_d),
+            q_vec=self.backend.encode([q_ko])[0],
+            filters=filters, docs_p=docs_p, docs_d=docs_d,
+        )
+
+    def recommend_overlapped(self, title_ko: str, desc_ko: str, clarify,
+                             topk: int = K_FINAL, deadline: float | None = None,
+                             filters: dict | None = None) -> pd.DataFrame:
+        """
+        clarify(text) -> 영어 질의 (예: ClarifyModule().clarify) 를 별도 스레드에서 돌리는 동안
+        한국어 질의로 BM25/Dense 준비를 먼저 진행하고, 영어 질의가 오면 이어서 합침.
+        deadline(초) 안에 Clarify 가 끝나지 않거나 실패하면 한국어 결과만으로 진행.
+        """
+        deadline = CLARIFY_DEADLINE_S if deadline is None else deadline
+        t0 = time.perf_counter()
+        if not _CLARIFY_SLOTS.acquire(blocking=False):
+            # 앞선 요청의 Clarify 가 워커를 모두 점유 중 → 뒤에 줄 세우면 deadline 만 소모하므로 생략
+            logger.warning("Clarify 워커 포화 → 한국어 질의만으로 추천")
+            ko_stage = self.prepare_korean(title_ko, desc_ko, filters)
+            return self.recommend(title_ko, desc_ko, topk=topk, ko_stage=ko_stage, filters=filters)
+        try:
+            fut = _clarify_pool().submit(_clarify_pair, clarify, title_ko, desc_ko)
+        except BaseException:
+            _CLARIFY_SLOTS.release()
+            raise
+        fut.add_done_callback(lambda _: _CLARIFY_SLOTS.release())
+        ko_stage = self.prepare_korean(title_ko, desc_ko, filters)
+        try:
+            en_title, en_desc = fut.result(timeout=max(0.0, deadline - (time.perf_counter() - t0)))
+        except FutureTimeout:
+            fut.cancel()  # 아직 시작 전이면 취소 (이미 실행 중이면 끝날 때 슬롯 반환)
+            logger.warning(f"Clarify deadline({deadline:.1f}s) 초과 → 한국어 질의만으로 추천")
+            en_title = en_desc = None
+        except Exception as e:
+            logger.warning(f"Clarify 실패({e!r}) → 한국어 질의만으로 추천")
+            en_title = en_desc = None
+        return self.recommend(title_ko, desc_ko, en_title=en_title, en_desc=en_desc,
+                              topk=topk, ko_stage=ko_stage, filters=filters)
+
+    def recommend(self, title_ko: str, desc_ko: str,
+                  en_title: str | None = None, en_desc: str | None = None,
+                  topk: int = K_FINAL, ko_stage: "_KoreanStage | None" = None,
+                  filters: dict | None = None) -> pd.DataFrame:
+        """filters: {"year_min", "year_max", "org", "lang"} — BM25/Dense 후보 생성 단계에서 적용"""
+        index = self.index
+        papers_df, datasets_df, backend = self.papers_df, self.datasets_df, self.backend
+
+        # ★ 응답 캐시 (정규화 입력 + 필터 + 인덱스 버전)
+        filters = ko_stage.filters if ko_stage is not None else normalize_filters(filters)
+        cache = get_response_cache() if USE_RESPONSE_CACHE else None
+        if cache is not None:
+            extra = {"filters": filters} if filters else {}
+            key = cache.make_key(index.version, title_ko, desc_ko, en_title, en_desc, topk, **extra)
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+
+        # 0) 쿼리 문자열 (한국어 단계는 미리 계산된 것이 있으면 재사용)
+        ko = ko_stage or self.prepare_korean(title_ko, desc_ko, filters)
+        q_ko = ko.q_ko
+        q_en = (safe_text(en_title) + " " + safe_text(en_desc)).strip() if (en_title or en_desc) else None
+
+        # 1) BM25: 한국어 토큰 누적 점수에 영어 토큰을 이어서 누적 (= ko+en 토큰 한 번에 계산)
+        #    필터가 있으면 허용 문서만 채점/정렬 → 문서 id 로 되돌림
+        en_tokens = lite_tokens(q_en) if q_en else []
+        f_p = index.bm25_p.field_scores(en_tokens, ko.bm25_p, ko.docs_p) if en_tokens else ko.bm25_p
+        f_d = index.bm25_d.field_scores(en_tokens, ko.bm25_d, ko.docs_d) if en_tokens else ko.bm25_d
+        b_p = index.bm25_p.combine(f_p, ko.docs_p); top_p = np.argsort(-b_p, kind="stable")[:min(TOPN_BM25, len(b_p))]
+        b_d = index.bm25_d.combine(f_d, ko.docs_d); top_d = np.argsort(-b_d, kind="stable")[:min(TOPN_BM25, len(b_d))]
+        idx_p = top_p if ko.docs_p is None else ko.docs_p.ids[top_p]
+        idx_d = top_d if ko.docs_d is None else ko.docs_d.ids[top_d]
+
+        # 2) Dense (캐시된 임베딩에서 후보만 참조)
+        q_vec = combine_query_vec(backend, q_ko, q_en, q_ko=ko.q_vec)
+        s_p_dense = index.p_vecs[idx_p] @ q_vec
+        s_d_dense = index.d_vecs[idx_d] @ q_vec
+
+        cand_p = pd.DataFrame({"src":"paper","idx":idx_p, "bm25":b_p[top_p], "dense":s_p_dense})
+        cand_d = pd.DataFrame({"src":"dataset","idx":idx_d, "bm25":b_d[top_d], "dense":s_d_dense})
+        result = rank_candidates(
+            papers_df, datasets_df, backend, cand_p, cand_d,
+            lambda src, i: (index.p_texts if src == "paper" else index.d_texts)[i],
+            q_ko, q_en, title_ko, desc_ko, topk,
+        )
+
+        if cache is not None:
+            cache.put(key, result)
+        return result
+
+
+# -------------------- 다단계 추천 --------------------
+def multistage_recommend(
+    title_ko: str, desc_ko: str,
+    papers_df: pd.DataFrame, datasets_df: pd.DataFrame,
+    backend,
+    en_title: str | None = None, en_desc: str | None = None,
+    topk: int = K_FINAL, filters: dict | None = None
+) -> pd.DataFrame:
+    """프로세스 전역 인덱스를 공유하는 Pipeline 으로 위임 (기존 호출부 호환)"""
+    index = get_retrieval_index(papers_df, datasets_df, backend)
+    return Pipeline(papers_df, datasets_df, backend, index=index).recommend(
+        title_ko, desc_ko, en_title=en_title, en_desc=en_desc, topk=topk, filters=filters
+    )
+
+def overlapped_recommend(
+    title_ko: str, desc_ko: str,
+    papers_df: pd.DataFrame, datasets_df: pd.DataFrame,
+    backend, clarify,
+    topk: int = K_FINAL, deadline: float | None = None, filters: dict | None = None
+) -> pd.DataFrame:
+    """Clarify(번역+명확화)와 한국어 검색 단계를 겹쳐 실행 (Pipeline.recommend_overlapped 참고)"""
+    index = get_retrieval_index(papers_df, datasets_df, backend)
+    return Pipeline(papers_df, datasets_df, backend, index=index).recommend_overlapped(
+        title_ko, desc_ko, clarify, topk=topk, deadline=deadline, filters=filters
+    )
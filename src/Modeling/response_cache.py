@@ -0,0 +1,153 @@
+"""
+multistage_recommend 응답 캐시.
+
+- 키: 정규화된 입력(title_ko, desc_ko, en_title, en_desc, topk) + 인덱스 버전
+  → 코퍼스/모델 설정이 바뀌면 버전이 달라져 이전 응답은 자동으로 무시됨
+- 1차: 프로세스 내 LRU (크기 제한, 스레드 안전)
+- 2차(옵션): SQLite 파일 → 여러 워커 프로세스가 같은 파일을 가리키면 히트 공유
+- hit/miss 통계 제공 (stats())
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_rx_space = re.compile(r"\s+")
+
+
+def _norm(x) -> str:
+    if x is None:
+        return ""
+    try:
+        if x != x:  # NaN
+            return ""
+    except Exception:
+        pass
+    return _rx_space.sub(" ", str(x)).strip()
+
+
+class ResponseCache:
+    """크기 제한 LRU + (옵션) SQLite 공유 캐시"""
+
+    def __init__(self, max_entries: int = 1024, db_path: str | None = None,
+                 max_db_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.max_db_entries = max_db_entries
+        self.db_path = db_path
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()  # sqlite 커넥션은 스레드별로 분리
+        self._stats = {"hits": 0, "db_hits": 0, "misses": 0, "evictions": 0, "puts": 0}
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with self._conn() as con:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, version TEXT, value BLOB, atime REAL)"
+                )
+                con.execute("CREATE INDEX IF NOT EXISTS responses_atime ON responses(atime)")
+
+    # ---------- key ----------
+    @staticmethod
+    def make_key(version, title_ko, desc_ko, en_title=None, en_desc=None, topk=None, **extra) -> str:
+        payload = {
+            "v": str(version),
+            "q": [_norm(title_ko), _norm(desc_ko), _norm(en_title), _norm(en_desc)],
+            "k": int(topk) if topk is not None else None,
+        }
+        if extra:
+            payload["x"] = extra
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return f"{version}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    # ---------- sqlite ----------
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _db_get(self, key):
+        con = self._conn()
+        row = con.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        con.execute("UPDATE responses SET atime = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def _db_put(self, key, value):
+        con = self._conn()
+        version = key.split(":", 1)[0]
+        con.execute(
+            "INSERT OR REPLACE INTO responses(key, version, value, atime) VALUES (?, ?, ?, ?)",
+            (key, version, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+        )
+        # 크기 제한: 다른 버전 항목을 먼저, 그다음 오래된 항목부터 삭제
+        n = con.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if n > self.max_db_entries:
+            con.execute("DELETE FROM responses WHERE version != ?", (version,))
+            con.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY atime ASC LIMIT ?)",
+                (max(0, n - self.max_db_entries),),
+            )
+
+    # ---------- public ----------
+    def get(self, key):
+        """캐시된 결과(DataFrame 복사본) 또는 None"""
+        with self._lock:
+            value = self._mem.get(key)
+            if value is not None:
+                self._mem.move_to_end(key)
+                self._stats["hits"] += 1
+                return value.copy()
+
+        if self.db_path:
+            value = self._db_get(key)
+            if value is not None:
+                self._mem_put(key, value)
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._stats["db_hits"] += 1
+                return value.copy()
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def _mem_put(self, key, value):
+        with self._lock:
+            self._mem[key] = value
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def put(self, key, value):
+        value = value.copy()
+        self._mem_put(key, value)
+        with self._lock:
+            self._stats["puts"] += 1
+        if self.db_path:
+            self._db_put(key, value)
+
+    def clear(self):
+        """프로세스 내 LRU만 비움 (디스크 항목은 버전 불일치로 자연히 무효화)"""
+        with self._lock:
+            self._mem.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = len(self._mem)
+        total = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / total if total else 0.0
+        return s
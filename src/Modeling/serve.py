@@ -0,0 +1,278 @@
+"""
+Pre-fork 서빙 모드: 부모 프로세스가 모델·인덱스를 한 번 로드한 뒤 워커를 fork.
+
+- 모델 가중치(SBERT, CE, 옵션: opus-mt/Flan-T5)는 fork 전에 로드 → 자식은 copy-on-write 로 페이지 공유
+- Dense 임베딩은 build_cache.py 산출물을 mmap 으로 열어 파일 페이지 공유 (없으면 부모에서 구축)
+- gc.freeze() 로 fork 전 객체를 GC 대상에서 제외 → GC 가 헤더를 건드려 페이지가 복사되는 것 방지
+- 워커별 torch 스레드 수를 코어 수 / 워커 수로 고정 → 과다 구독(oversubscription) 방지
+- 리슨 소켓은 부모가 열고 워커들이 같은 소켓에서 accept (커널이 분배)
+
+실행 (기본 127.0.0.1 바인딩, 외부 노출은 --host 0.0.0.0 --public):
+  PYTHONPATH=src/Modeling python src/Modeling/serve.py --workers 4 --port 8000 --report-memory
+요청:
+  curl -XPOST localhost:8000/recommend -d '{"title": "딥러닝 의료 영상", "desc": "", "topk": 5}'
+  curl -XPOST localhost:8000/recommend -d '{"title": "기후", "filters": {"year_min": 2020, "org": "KISTI"}}'
+  curl localhost:8000/stats
+  curl "localhost:8000/suggest?q=%EB%94%A5%EB%9F%AC&k=8"     # 자동완성 (cache/suggest.bin, 모델 호출 없음)
+"""
+import argparse
+import gc
+import ipaddress
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pipeline
+from pipeline import load_df, get_backend, get_cross_encoder, Pipeline, RetrievalIndex
+from suggest import SuggestIndex
+
+_PIPE: Pipeline | None = None
+_CLARIFIER = None
+_SUGGEST: SuggestIndex | None = None
+
+
+# -------------------- 메모리 측정 --------------------
+def memory_usage(pid: int | str = "self") -> dict:
+    """/proc/<pid>/smaps_rollup 기준 RSS/PSS/USS(kB). USS = 해당 프로세스만 쓰는 증분 메모리"""
+    keys = {"Rss", "Pss", "Private_Clean", "Private_Dirty", "Shared_Clean", "Shared_Dirty"}
+    out = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                k, _, rest = line.partition(":")
+                if k in keys:
+                    out[k] = int(rest.split()[0])
+    except OSError:
+        return {}
+    out["Uss"] = out.get("Private_Clean", 0) + out.get("Private_Dirty", 0)
+    return out
+
+
+def _pin_threads(n: int):
+    os.environ["OMP_NUM_THREADS"] = str(n)
+    os.environ["MKL_NUM_THREADS"] = str(n)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+        torch.set_num_threads(n)
+    except ImportError:
+        pass
+
+
+# -------------------- HTTP 핸들러 --------------------
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, code: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            self._send(200, {
+                "pid": os.getpid(),
+                "memory_kb": memory_usage(),
+                "response_cache": pipeline.get_response_cache().stats(),
+            })
+        elif url.path == "/suggest":
+            if _SUGGEST is None:
+                return self._send(503, {"error": "suggest index not built (build_cache.py)"})
+            qs = parse_qs(url.query)
+            try:
+                k = min(50, max(1, int(qs.get("k", ["10"])[0])))
+            except ValueError:
+                return self._send(400, {"error": "invalid k"})
+            self._send(200, {"results": _SUGGEST.suggest(qs.get("q", [""])[0], k)})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/recommend":
+            return self._send(404, {"error": "not found"})
+        try:
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "invalid json"})
+        if not isinstance(req, dict):
+            return self._send(400, {"error": "request body must be a JSON object"})
+        title, desc = req.get("title", ""), req.get("desc", "")
+        if not title and not desc:
+            return self._send(400, {"error": "title 또는 desc 중 하나는 필요"})
+
+        try:
+            topk = int(req.get("topk", pipeline.K_FINAL))
+        except (TypeError, ValueError):
+            return self._send(400, {"error": "invalid topk"})
+        if topk < 1:
+            return self._send(400, {"error": "topk must be >= 1"})
+        try:
+            filters = pipeline.normalize_filters(req.get("filters"))
+        except (TypeError, ValueError) as e:
+            return self._send(400, {"error": f"invalid filters: {e}"})
+        en_title, en_desc = req.get("en_title"), req.get("en_desc")
+        try:
+            if _CLARIFIER is not None and en_title is None and en_desc is None:
+                # Clarify(번역+명확화)와 한국어 검색 단계를 겹쳐 실행, deadline 초과 시 한국어 결과
+                df = _PIPE.recommend_overlapped(title, desc, _CLARIFIER.clarify, topk=topk, filters=filters)
+            else:
+                df = _PIPE.recommend(title, desc, en_title=en_title, en_desc=en_desc, topk=topk, filters=filters)
+            results = df.to_dict("records")
+        except Exception as e:
+            # 연결을 끊지 않고 JSON 500 응답 (원인은 워커 stderr 에 남김)
+            traceback.print_exc()
+            return self._send(500, {"error": f"internal error: {type(e).__name__}"})
+        self._send(200, {"results": results})
+
+    def log_message(self, fmt, *args):  # 워커별 접근 로그는 생략
+        pass
+
+
+# -------------------- 부모: 로드 → fork --------------------
+def _load(args):
+    global _PIPE, _CLARIFIER, _SUGGEST
+    backend = get_backend()
+    papers = load_df(args.papers)
+    datasets = load_df(args.datasets)
+    index = RetrievalIndex.load(papers, datasets, backend, cache_dir=args.cache_dir, mmap=True)
+    _PIPE = Pipeline(papers, datasets, backend, index=index)
+    suggest_path = os.path.join(args.cache_dir, "suggest.bin")
+    if os.path.exists(suggest_path):
+        _SUGGEST = SuggestIndex(suggest_path)  # mmap → 워커들이 페이지 공유
+
+    if pipeline.USE_CE:
+        # CE 가중치를 fork 전에 로드 (PyTorch 는 워커들이 페이지 공유).
+        # 추론은 하지 않음: BACKEND=onnx 면 ORT 세션이 워커마다 처음 호출 때 생성되므로 부모에 만들지 않음
+        get_cross_encoder()
+    if args.clarify:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Clarify"))
+        from clarify_utils import ClarifyModule
+        _CLARIFIER = ClarifyModule()
+
+
+def _worker(server: HTTPServer, threads: int, ready_w: int):
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _pin_threads(threads)
+    _PIPE.recommend("warm up", "", topk=1)  # 지연 초기화 경로를 미리 통과
+    try:
+        os.write(ready_w, b"1")
+    except BrokenPipeError:  # 부모가 준비 신호를 기다리지 않는 경우에도 워커는 계속 서빙
+        pass
+    os.close(ready_w)
+    server.serve_forever()
+
+
+def _spawn(server, threads):
+    ready_r, ready_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(ready_r)
+        try:
+            _worker(server, threads, ready_w)
+        finally:
+            os._exit(0)
+    os.close(ready_w)
+    return pid, ready_r
+
+
+def _report_memory(parent_before: dict, pids):
+    print("\n[memory] kB (RSS: 상주, PSS: 공유 페이지 균등 분배, USS: 워커 고유 증분)")
+    print(f"  parent(load 전)  RSS={parent_before.get('Rss', 0):>9}")
+    m = memory_usage()
+    print(f"  parent(load 후)  RSS={m.get('Rss', 0):>9}  PSS={m.get('Pss', 0):>9}  USS={m.get('Uss', 0):>9}")
+    uss = []
+    for pid in pids:
+        m = memory_usage(pid)
+        uss.append(m.get("Uss", 0))
+        print(f"  worker {pid:<8} RSS={m.get('Rss', 0):>9}  PSS={m.get('Pss', 0):>9}  USS={m.get('Uss', 0):>9}")
+    if uss:
+        print(f"  → 워커당 증분 메모리(평균 USS): {sum(uss) / len(uss) / 1024:.1f} MB")
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--cache-dir", default="cache")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--public", action="store_true",
+                    help="루프백이 아닌 --host 바인딩 허용 (인증 없는 서버이므로 리버스 프록시/사설망 뒤에서만)")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--threads", type=int, default=None, help="워커당 torch 스레드 (기본: 코어/워커)")
+    ap.add_argument("--clarify", action="store_true", help="opus-mt/Flan-T5 도 fork 전에 로드")
+    ap.add_argument("--report-memory", action="store_true")
+    args = ap.parse_args()
+    if not args.public and not _is_loopback(args.host):
+        ap.error(f"--host {args.host}: 루프백 외 주소는 --public 을 함께 지정해야 함")
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    parent_before = memory_usage()
+    _pin_threads(threads)
+    _load(args)
+
+    server = HTTPServer((args.host, args.port), Handler)
+    gc.collect()
+    gc.freeze()
+
+    workers = {}
+    for _ in range(args.workers):
+        pid, ready_r = _spawn(server, threads)
+        workers[pid] = ready_r
+    for ready_r in workers.values():
+        os.read(ready_r, 1)
+        os.close(ready_r)
+    print(f"[OK] {args.workers} workers × {threads} threads → http://{args.host}:{args.port}")
+    if args.report_memory:
+        _report_memory(parent_before, list(workers))
+
+    stopping = False
+    def _stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    # 워커가 죽으면 다시 fork (부모의 모델/인덱스 페이지를 그대로 공유)
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.pop(pid, None)
+        if not stopping:
+            print(f"[WARN] worker {pid} exited → respawn")
+            new_pid, ready_r = _spawn(server, threads)
+            os.read(ready_r, 1)  # 워밍업 완료까지 대기 (죽으면 EOF → 다음 wait 에서 다시 처리)
+            os.close(ready_r)
+            workers[new_pid] = None
+        time.sleep(0.1)
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+샤드 인덱스 모드: 코퍼스를 파티션 그룹(연속 행 구간) 단위로 나눠 샤드별로 BM25 역색인 + Dense 임베딩을 보관하고,
+코디네이터가 질의를 뿌린 뒤(scatter) 샤드별 Top-N 을 모아(gather) CE 단계부터는 단일 인덱스와 같은 경로로 처리.
+
+- 전역 통계: 코디네이터가 샤드별 (문서 수, 총 토큰 수, 어휘, 문서 빈도)를 모아
+  N / avgdl / 문서 빈도 / 음수 idf 대체값(epsilon × 평균 idf)을 계산해 각 샤드에 배포
+  → 샤드 BM25 점수가 단일 인덱스 점수와 비트 단위로 동일
+- 병합: 샤드별 Top-N 을 (점수 내림차순, 전역 문서 id 오름차순)으로 합쳐 전역 Top-N
+  (단일 인덱스의 stable argsort 와 같은 순서) → 이후 Dense 상위 M / CE / 레벨 / 표는 rank_candidates 공용
+- 샤드 호출 방식
+    LocalShard  : 같은 프로세스 (테스트/대체용)
+    RemoteShard : multiprocessing.connection 기반 RPC (로컬 워커 프로세스 또는 다른 호스트)
+
+실행 (샤드 서버, 호스트별 1개; SHARD_AUTHKEY 필수, 기본 바인딩 127.0.0.1):
+  SHARD_AUTHKEY=... PYTHONPATH=src/Modeling python src/Modeling/sharded.py --shard 0 --n-shards 4 --host 10.0.0.5 --port 7100
+코디네이터:
+  pipe = ShardedPipeline(papers, datasets, backend, [RemoteShard(("host-a", 7100)), ...])
+  pipe.recommend("딥러닝 의료 영상", "")
+"""
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from pipeline import (
+    FIELD_WEIGHTS, K_FINAL, TOPN_BM25,
+    FacetIndex, WeightedBM25,
+    bm25_eps_idf, bm25_raw_idf, combine_query_vec, dense_texts, get_backend,
+    lite_tokens, load_df, normalize_filters, rank_candidates, safe_text,
+)
+
+# RPC 는 pickle 로 주고받으므로 authkey 가 곧 실행 권한. 기본값 없음 (샤드 서버/원격 클라이언트는 필수)
+SHARD_AUTHKEY = os.getenv("SHARD_AUTHKEY", "").encode("utf-8")
+SOURCES = ("paper", "dataset")
+
+
+# -------------------- 파티션 --------------------
+def partition_bounds(n_rows: int, n_shards: int) -> List[int]:
+    """연속 행 구간 경계 (part 파일을 순서대로 병합한 코퍼스 → 파티션 그룹 단위)"""
+    return [n_rows * i // n_shards for i in range(n_shards + 1)]
+
+
+# -------------------- 샤드 --------------------
+class _ShardPart:
+    """한 소스(paper/dataset)의 행 구간: 로컬 BM25 + 임베딩 + facet"""
+    def __init__(self, df: pd.DataFrame, backend, offset: int, vecs: np.ndarray | None = None):
+        self.offset = offset
+        self.bm25 = WeightedBM25(df, FIELD_WEIGHTS, keep_empty=True)
+        self.texts = dense_texts(df)
+        self.vecs = np.asarray(backend.encode(self.texts)) if vecs is None else vecs
+        self.facets = FacetIndex(df)
+
+    def stats(self) -> dict:
+        out = {}
+        for f, (fb, _) in self.bm25.fields.items():
+            out[f] = (fb.corpus_size, int(fb.doc_len.sum()), list(fb.vocab), np.diff(fb.indptr).tolist())
+        return out
+
+    def search(self, tokens: List[str], q_vec: np.ndarray, topn: int, filters: dict | None):
+        docs = self.facets.select(filters)
+        b = self.bm25.combine(self.bm25.field_scores(tokens, docs=docs), docs)
+        top = np.argsort(-b, kind="stable")[:min(topn, len(b))]
+        local = top if docs is None else docs.ids[top]
+        return (local + self.offset, b[top], self.vecs[local] @ q_vec, [self.texts[i] for i in local])
+
+
+class IndexShard:
+    """
+    코퍼스 일부(papers/datasets 각각 연속 행 구간)에 대한 인덱스.
+    p_offset/d_offset: 이 구간 첫 행의 전역 문서 id. p_vecs/d_vecs: 미리 계산된 임베딩(선택)
+    """
+    def __init__(self, papers_df: pd.DataFrame, datasets_df: pd.DataFrame, backend,
+                 p_offset: int = 0, d_offset: int = 0,
+                 p_vecs: np.ndarray | None = None, d_vecs: np.ndarray | None = None):
+        self.parts = {
+            "paper": _ShardPart(papers_df, backend, p_offset, p_vecs),
+            "dataset": _ShardPart(datasets_df, backend, d_offset, d_vecs),
+        }
+
+    def stats(self) -> dict:
+        """로컬 term 통계 (코디네이터가 전역 통계 계산에 사용)"""
+        return {src: part.stats() for src, part in self.parts.items()}
+
+    def set_global_stats(self, stats: dict) -> bool:
+        """stats[src][field] = (N, avgdl, 로컬 어휘 순서의 전역 문서 빈도, 음수 idf 대체값)"""
+        for src, part in self.parts.items():
+            for f, (fb, _) in part.bm25.fields.items():
+                n, avgdl, df, eps = stats[src][f]
+                fb.apply_global_stats(n, avgdl, df, eps)
+        return True
+
+    def search(self, tokens: List[str], q_vec: np.ndarray, topn: int = TOPN_BM25,
+               filters: dict | None = None) -> dict:
+        """src → (전역 문서 id, BM25 점수, Dense 점수, 문서 텍스트) — 각 소스 로컬 Top-N"""
+        return {src: part.search(tokens, q_vec, topn, filters) for src, part in self.parts.items()}
+
+
+# -------------------- 샤드 클라이언트 --------------------
+def _authkey(authkey: bytes | None) -> bytes:
+    authkey = authkey or SHARD_AUTHKEY
+    if not authkey:
+        raise RuntimeError("SHARD_AUTHKEY 가 설정되지 않음: 샤드 서버와 코디네이터에 같은 임의의 긴 비밀값을 지정해야 함")
+    return authkey
+
+
+class LocalShard:
+    """같은 프로세스의 IndexShard 를 RemoteShard 와 같은 인터페이스로 감쌈"""
+    def __init__(self, shard: IndexShard):
+        self.shard = shard
+
+    def call(self, method: str, *args, **kwargs):
+        return getattr(self.shard, method)(*args, **kwargs)
+
+    def close(self):
+        pass
+
+
+class RemoteShard:
+    """multiprocessing.connection RPC 클라이언트 (연결 1개, 호출은 잠금으로 직렬화)"""
+    def __init__(self, address, authkey: bytes | None = None):
+        self.address = tuple(address)
+        self._conn = Client(self.address, authkey=_authkey(authkey))
+        self._lock = threading.Lock()
+
+    def call(self, method: str, *args, **kwargs):
+        with self._lock:
+            self._conn.send((method, args, kwargs))
+            status, value = self._conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"shard {self.address} {method} 실패: {value}")
+        return value
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_RPC_METHODS = {"stats", "set_global_stats", "search"}
+
+def _handle(conn, shard: IndexShard):
+    with conn:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if method not in _RPC_METHODS:
+                    raise ValueError(f"unknown method: {method}")
+                conn.send(("ok", getattr(shard, method)(*args, **kwargs)))
+            except Exception as e:
+                conn.send(("err", repr(e)))
+
+def serve_shard(shard: IndexShard, address=("127.0.0.1", 7100), authkey: bytes | None = None, ready=None):
+    """연결마다 스레드 1개. ready: 바인딩된 주소를 보낼 Connection (로컬 워커 기동용)"""
+    with Listener(tuple(address), authkey=_authkey(authkey)) as listener:
+        if ready is not None:
+            ready.send(listener.address)
+            ready.close()
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(conn, shard), daemon=True).start()
+
+
+def _shard_worker(papers_df, datasets_df, p_offset, d_offset, ready, authkey, p_vecs=None, d_vecs=None):
+    # 임베딩을 넘겨받았으면 모델 로드 생략 (질의 임베딩은 코디네이터가 계산)
+    backend = get_backend() if p_vecs is None or d_vecs is None else None
+    shard = IndexShard(papers_df, datasets_df, backend, p_offset, d_offset, p_vecs, d_vecs)
+    serve_shard(shard, ("127.0.0.1", 0), authkey, ready=ready)
+
+
+def slice_shards(papers_df: pd.DataFrame, datasets_df: pd.DataFrame, n_shards: int):
+    """i 번째 샤드의 (papers 구간, datasets 구간, p_offset, d_offset)"""
+    pb, db = partition_bounds(len(papers_df), n_shards), partition_bounds(len(datasets_df), n_shards)
+    for i in range(n_shards):
+        yield (papers_df.iloc[pb[i]:pb[i + 1]], datasets_df.iloc[db[i]:db[i + 1]], pb[i], db[i])
+
+
+def local_shards(papers_df, datasets_df, backend, n_shards: int,
+                 p_vecs: np.ndarray | None = None, d_vecs: np.ndarray | None = None) -> List[LocalShard]:
+    shards = []
+    for p, d, po, do in slice_shards(papers_df, datasets_df, n_shards):
+        pv = None if p_vecs is None else p_vecs[po:po + len(p)]
+        dv = None if d_vecs is None else d_vecs[do:do + len(d)]
+        shards.append(LocalShard(IndexShard(p, d, backend, po, do, pv, dv)))
+    return shards
+
+
+def spawn_process_shards(papers_df, datasets_df, n_shards: int,
+                         p_vecs: np.ndarray | None = None, d_vecs: np.ndarray | None = None):
+    """로컬 워커 프로세스 n 개를 띄우고 (RemoteShard 목록, 프로세스 목록) 반환. 워커는 get_backend() 로 모델 로드"""
+    ctx = get_context("fork")
+    authkey = SHARD_AUTHKEY or os.urandom(32)  # 로컬 워커 전용 (루프백 바인딩), 미설정 시 실행마다 임의 생성
+    clients, procs = [], []
+    for p, d, po, do in slice_shards(papers_df, datasets_df, n_shards):
+        pv = None if p_vecs is None else p_vecs[po:po + len(p)]
+        dv = None if d_vecs is None else d_vecs[do:do + len(d)]
+        recv, send = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_shard_worker, args=(p, d, po, do, send, authkey, pv, dv), daemon=True)
+        proc.start()
+        procs.append((proc, recv))
+    for proc, recv in procs:
+        clients.append(RemoteShard(recv.recv(), authkey))
+    return clients, [proc for proc, _ in procs]
+
+
+# -------------------- 코디네이터 --------------------
+def global_term_stats(shard_stats: List[dict], epsilon: float = 0.25) -> List[dict]:
+    """
+    샤드별 로컬 통계 → 샤드별로 배포할 전역 통계.
+    전역 어휘 순서 = 샤드 순서대로 처음 등장한 순서 (= 단일 인덱스의 어휘 순서) → 평균 idf 합산 순서까지 동일
+    """
+    out = [{src: {} for src in SOURCES} for _ in shard_stats]
+    for src in SOURCES:
+        fields = dict.fromkeys(f for st in shard_stats for f in st[src])
+        for f in fields:
+            n_docs, total_len, gdf = 0, 0, {}
+            for st in shard_stats:
+                n, tl, vocab, df = st[src].get(f, (0, 0, [], []))
+                n_docs += n; total_len += tl
+                for t, c in zip(vocab, df):
+                    gdf[t] = gdf.get(t, 0) + c
+            avgdl = float(total_len) / max(1, n_docs)
+            eps = bm25_eps_idf(bm25_raw_idf(list(gdf.values()), n_docs), epsilon)
+            for i, st in enumerate(shard_stats):
+                if f in st[src]:
+                    vocab = st[src][f][2]
+                    out[i][src][f] = (n_docs, avgdl, [gdf[t] for t in vocab], eps)
+    return out
+
+
+def merge_topn(results: List[tuple], topn: int):
+    """샤드별 (ids, bm25, dense, texts) → 전역 Top-N (점수 내림차순, 동점은 문서 id 오름차순)"""
+    ids = np.concatenate([r[0] for r in results]).astype(np.int64)
+    bm25 = np.concatenate([r[1] for r in results]).astype(float)
+    dense = np.concatenate([r[2] for r in results]) if len(ids) else np.empty(0)
+    texts = [t for r in results for t in r[3]]
+    order = np.lexsort((ids, -bm25))[:topn]
+    return ids[order], bm25[order], dense[order], [texts[i] for i in order]
+
+
+class ShardedPipeline:
+    """
+    샤드 코디네이터. Pipeline.recommend 와 같은 입력/출력 (응답 캐시는 사용하지 않음).
+    papers_df/datasets_df 는 결과 표(제목/설명/URL) 작성에만 사용.
+    """
+    def __init__(self, papers_df: pd.DataFrame, datasets_df: pd.DataFrame, backend, shards):
+        self.papers_df = papers_df
+        self.datasets_df = datasets_df
+        self.backend = backend
+        self.shards = list(shards)
+        self._pool = ThreadPoolExecutor(max(1, len(self.shards)), thread_name_prefix="shard")
+        self.broadcast_stats()
+
+    def _scatter(self, method: str, *args, **kwargs) -> list:
+        futs = [self._pool.submit(s.call, method, *args, **kwargs) for s in self.shards]
+        return [f.result() for f in futs]
+
+    def broadcast_stats(self):
+        stats = self._scatter("stats")
+        for shard, g in zip(self.shards, global_term_stats(stats)):
+            shard.call("set_global_stats", g)
+
+    def recommend(self, title_ko: str, desc_ko: str,
+                  en_title: str | None = None, en_desc: str | None = None,
+                  topk: int = K_FINAL, filters: dict | None = None) -> pd.DataFrame:
+        q_ko = (safe_text(title_ko) + " " + safe_text(desc_ko)).strip()
+        q_en = (safe_text(en_title) + " " + safe_text(en_desc)).strip() if (en_title or en_desc) else None
+        tokens = lite_tokens(q_ko) + (lite_tokens(q_en) if q_en else [])
+        q_vec = combine_query_vec(self.backend, q_ko, q_en)
+
+        results = self._scatter("search", tokens, q_vec, TOPN_BM25, normalize_filters(filters))
+        cands, texts = {}, {}
+        for src in SOURCES:
+            ids, bm25, dense, txt = merge_topn([r[src] for r in results], TOPN_BM25)
+            cands[src] = pd.DataFrame({"src": src, "idx": ids, "bm25": bm25, "dense": dense})
+            texts.update({(src, int(i)): t for i, t in zip(ids, txt)})
+
+        return rank_candidates(
+            self.papers_df, self.datasets_df, self.backend, cands["paper"], cands["dataset"],
+            lambda src, i: texts[(src, i)],
+            q_ko, q_en, title_ko, desc_ko, topk,
+        )
+
+    def close(self):
+        for s in self.shards:
+            s.close()
+        self._pool.shutdown(wait=False)
+
+
+# -------------------- 샤드 서버 실행 --------------------
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--shard", type=int, required=True, help="이 호스트가 맡을 샤드 번호 (0부터)")
+    ap.add_argument("--n-shards", type=int, required=True)
+    ap.add_argument("--host", default="127.0.0.1", help="다른 호스트의 코디네이터가 붙으려면 사설망 주소로 지정")
+    ap.add_argument("--port", type=int, default=7100)
+    args = ap.parse_args()
+    if not SHARD_AUTHKEY:
+        ap.error("SHARD_AUTHKEY 환경변수가 필요함 (코디네이터와 같은 값)")
+
+    p, d, po, do = list(slice_shards(load_df(args.papers), load_df(args.datasets), args.n_shards))[args.shard]
+    shard = IndexShard(p, d, get_backend(), po, do)
+    print(f"[OK] shard {args.shard}/{args.n_shards}: papers {po}+{len(p)}, datasets {do}+{len(d)} "
+          f"→ {args.host}:{args.port}")
+    serve_shard(shard, (args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+검색창 제목 자동완성(prefix suggestion) 인덱스.
+
+- 후보: papers / datasets CSV 의 title + keywords (정규화 문자열 기준으로 합침)
+- 정규화: NFKC → casefold → 구두점/기호 제거 → 한글 자모 분해(겹자모는 입력 순서대로 분리)
+  → "한구"(입력 중) 가 "한국" 의, "달" 이 "닭" 의, "갑" 이 "가방" 의 prefix 가 됨
+- 키: 항목의 처음 + 단어 시작 위치(최대 MAX_WORD_STARTS 개)마다 하나 → 제목 중간 단어로도 검색
+  (맨 앞 키는 항목 전체, 단어 중간 키는 MAX_KEY_CHARS 글자까지. 더 긴 질의는 맨 앞 키로 정확히 찾고,
+   모자라면 잘린 질의 구간의 점수 순 상위 MAX_LONG_CANDIDATES 개 항목만 전체 문자열로 후필터 → 비용 상한 고정)
+- 정렬된 키 배열에서 이진 탐색으로 prefix 구간 [lo, hi) 을 찾고,
+  키 점수 위 segment tree(구간 argmax)로 구간 내 상위 k 개를 힙으로 꺼냄 → 구간 크기와 무관하게 O(k log n)
+- 점수 = log1p(등장 빈도) (POPULARITY_COLS 컬럼이 있으면 행 가중에 반영), 단어 중간 키는 MID_WORD_FACTOR 배
+- 모델/BM25 없이 파일 하나(cache/suggest.bin)를 mmap 으로 열어 사용 → serve.py 워커들이 페이지 공유
+
+파일 형식 (little-endian, 각 구역 4바이트 정렬):
+  magic "RGA1" | u32 n_entries | u32 n_keys | u32 tree_size | u32 entry_blob_len | u32 key_blob_len
+  u32 entry_off[n_entries+1] | f32 entry_weight[n_entries] | u8 entry_kind[n_entries] | entry utf-8
+  u32 key_off[n_keys+1] | u32 key_entry[n_keys] | f32 key_score[n_keys] | u32 tree[2*tree_size] | key utf-8
+  (키는 utf-8 바이트 오름차순, tree[tree_size + i] = i, 내부 노드 = 자식 중 점수 큰 키 번호)
+
+실행:
+  PYTHONPATH=src/Modeling python src/Modeling/suggest.py --build     # (build_cache.py 에서도 생성)
+  PYTHONPATH=src/Modeling python src/Modeling/suggest.py --query "딥러닝 의ㄹ"
+"""
+import argparse
+import bisect
+import heapq
+import itertools
+import math
+import mmap
+import os
+import re
+import struct
+import time
+import unicodedata
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline import load_df, safe_text
+
+MAGIC = b"RGA1"
+SUGGEST_FILE = os.path.join("cache", "suggest.bin")
+MAX_WORD_STARTS = 8      # 항목당 단어 시작 키 수 상한
+MAX_KEY_CHARS = 48       # 단어 중간 키로 쓰는 정규화 문자열 길이 (자모 분해 전)
+MAX_LONG_CANDIDATES = 64   # 키보다 긴 질의에서 단어 중간 일치를 후필터로 확인할 항목 수 상한
+MAX_DISPLAY_CHARS = 200
+MIN_CHARS = 2
+MID_WORD_FACTOR = 0.8    # 단어 중간에서 시작하는 키의 점수 배율 (같은 인기도면 맨 앞 일치 우선)
+POPULARITY_COLS = ("popularity", "views", "downloads", "citations")
+KIND_PAPER, KIND_DATASET, KIND_KEYWORD = 1, 2, 4
+_KIND_NAMES = {"paper": KIND_PAPER, "dataset": KIND_DATASET}
+
+
+# -------------------- 정규화 / 자모 분해 --------------------
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = ["ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ",
+         "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ"]
+_JONG = ["", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+         "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+def _jamo_table() -> Dict[int, str]:
+    table = {}
+    for i in range(11172):  # 가 ~ 힣
+        table[0xAC00 + i] = _CHO[i // 588] + _JUNG[(i % 588) // 28] + _JONG[i % 28]
+    # NFKC 는 호환 자모(ㄱ, ㅘ …)를 조합형 자모(U+1100~)로 바꾸므로 조합형 → 분해된 호환 자모
+    for i, c in enumerate(_CHO):
+        table[0x1100 + i] = c
+    for i, v in enumerate(_JUNG):
+        table[0x1161 + i] = v
+    for i, t in enumerate(_JONG[1:]):
+        table[0x11A8 + i] = t
+    return table
+
+_JAMO = _jamo_table()
+_rx_nonword = re.compile(r"[\W_]+")
+
+def normalize(s: str) -> str:
+    s = unicodedata.normalize("NFKC", safe_text(s)).casefold()
+    return _rx_nonword.sub(" ", s).strip()
+
+def to_jamo(s: str) -> str:
+    return s.translate(_JAMO)
+
+def query_norm(prefix: str) -> str:
+    """입력 중인 문자열 정규화. 끝 공백은 단어 경계로 유지 ("딥러닝 " 은 "딥러닝x" 와 불일치)"""
+    norm = normalize(prefix)
+    if norm and prefix[-1:].isspace():
+        norm += " "
+    return norm
+
+def split_keywords(x) -> List[str]:
+    """keywords 컬럼: 리스트 / "a, b" / "['a', 'b']" 형태 모두 처리"""
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return [k for v in x for k in split_keywords(v)]
+    s = safe_text(x).strip().strip("[]")
+    return [k.strip(" '\"") for k in re.split(r"[,;|]", s) if k.strip(" '\"")]
+
+
+# -------------------- 구축 --------------------
+def _row_weights(df: pd.DataFrame) -> np.ndarray:
+    w = np.ones(len(df))
+    for col in POPULARITY_COLS:
+        if col in df.columns:
+            w += np.log1p(pd.to_numeric(df[col], errors="coerce").fillna(0).clip(lower=0).to_numpy())
+    return w
+
+def collect_entries(frames: List[Tuple[str, pd.DataFrame]]):
+    """(kind, df) 목록 → {정규화 문자열: [표시 문자열, 빈도 가중합, kind 비트]}"""
+    entries = {}
+    def add(text, w, kind):
+        display = " ".join(safe_text(text).split())[:MAX_DISPLAY_CHARS]
+        norm = normalize(display)
+        if len(norm) < MIN_CHARS:
+            return
+        e = entries.get(norm)
+        if e is None:
+            entries[norm] = [display, w, kind]
+        else:
+            e[1] += w
+            e[2] |= kind
+
+    for kind, df in frames:
+        titles = df["title"].tolist() if "title" in df.columns else [""] * len(df)
+        kws = df["keywords"].tolist() if "keywords" in df.columns else [""] * len(df)
+        for t, k, w in zip(titles, kws, _row_weights(df)):
+            add(t, w, _KIND_NAMES[kind])
+            for kw in split_keywords(k):
+                add(kw, w, KIND_KEYWORD)
+    return entries
+
+def _word_starts(norm: str) -> List[int]:
+    starts = [0] + [m.end() for m in re.finditer(" ", norm)]
+    return starts[:MAX_WORD_STARTS]
+
+def build_suggest_index(frames: List[Tuple[str, pd.DataFrame]], out_path: str = SUGGEST_FILE) -> int:
+    entries = collect_entries(frames)
+    norms = sorted(entries)
+    displays = [entries[n][0].encode("utf-8") for n in norms]
+    weights = np.array([math.log1p(entries[n][1]) for n in norms], dtype=np.float32)
+    kinds = np.array([entries[n][2] for n in norms], dtype=np.uint8)
+
+    keys = []
+    for eid, norm in enumerate(norms):
+        for pos in _word_starts(norm):
+            score = weights[eid] * (1.0 if pos == 0 else MID_WORD_FACTOR)
+            text = norm if pos == 0 else norm[pos:pos + MAX_KEY_CHARS]  # 맨 앞 키는 항목 전체 (최대 MAX_DISPLAY_CHARS)
+            keys.append((to_jamo(text).encode("utf-8"), -score, eid))
+    keys.sort()
+    n_keys = len(keys)
+    key_blob = [k for k, _, _ in keys]
+    key_entry = np.array([e for _, _, e in keys], dtype="<u4")
+    key_score = np.array([-s for _, s, _ in keys], dtype="<f4")
+
+    # segment tree (구간 argmax): 리프 = 키 번호, 빈 리프 = n_keys (점수 -1)
+    size = 1
+    while size < max(1, n_keys):
+        size *= 2
+    sc = np.append(key_score, np.float32(-1))
+    tree = np.full(2 * size, n_keys, dtype="<u4")
+    tree[size:size + n_keys] = np.arange(n_keys)
+    lo = size // 2
+    while lo >= 1:
+        left, right = tree[2 * lo:4 * lo:2], tree[2 * lo + 1:4 * lo:2]
+        tree[lo:2 * lo] = np.where(sc[left] >= sc[right], left, right)
+        lo //= 2
+
+    def offsets(blobs):
+        off = np.zeros(len(blobs) + 1, dtype="<u4")
+        off[1:] = np.cumsum([len(b) for b in blobs])
+        return off
+
+    def pad(b: bytes) -> bytes:
+        return b + b"\0" * (-len(b) % 4)
+
+    entry_blob, keys_blob = b"".join(displays), b"".join(key_blob)
+    tmp = str(out_path) + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(tmp)), exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<IIIII", len(norms), n_keys, size, len(entry_blob), len(keys_blob)))
+        f.write(offsets(displays).tobytes()); f.write(weights.astype("<f4").tobytes())
+        f.write(pad(kinds.tobytes())); f.write(pad(entry_blob))
+        f.write(offsets(key_blob).tobytes()); f.write(key_entry.tobytes()); f.write(key_score.tobytes())
+        f.write(tree.tobytes()); f.write(pad(keys_blob))
+    os.replace(tmp, out_path)  # 열려 있는 mmap(서빙 중인 워커)은 이전 파일을 계속 사용
+    return len(norms)
+
+
+# -------------------- 조회 (mmap) --------------------
+class _Blob:
+    """mmap 안의 가변 길이 문자열 배열: i 번째 바이트열 (bisect 용 시퀀스로도 사용)"""
+    def __init__(self, mm, base, off):
+        self.mm, self.base, self.off = mm, base, off
+
+    def __len__(self):
+        return len(self.off) - 1
+
+    def __getitem__(self, i):
+        return self.mm[self.base + self.off[i]:self.base + self.off[i + 1]]
+
+class SuggestIndex:
+    def __init__(self, path: str = SUGGEST_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(self._mm)
+        if mv[:4] != MAGIC:
+            raise ValueError(f"not a suggest index: {path}")
+        n_e, n_k, size, e_len, k_len = struct.unpack_from("<IIIII", mv, 4)
+        o = 24
+
+        def take(n, fmt=None, width=1):
+            """다음 구역: fmt 가 있으면 캐스팅한 memoryview, 없으면 (바이트열) 시작 오프셋"""
+            nonlocal o
+            start = o
+            o += n * width + (-(n * width) % 4)
+            return mv[start:start + n * width].cast(fmt) if fmt else start
+
+        entry_off = take(n_e + 1, "I", 4)
+        self.entry_weight = take(n_e, "f", 4)
+        self.entry_kind = take(n_e, "B", 1)
+        self.entries = _Blob(self._mm, take(e_len), entry_off)
+        key_off = take(n_k + 1, "I", 4)
+        self.key_entry = take(n_k, "I", 4)
+        self.key_score = take(n_k, "f", 4)
+        self.tree = take(2 * size, "I", 4)
+        self.keys = _Blob(self._mm, take(k_len), key_off)
+        self._views = [entry_off, self.entry_weight, self.entry_kind, key_off,
+                       self.key_entry, self.key_score, self.tree, mv]
+        self.n_entries, self.n_keys, self.size = n_e, n_k, size
+
+    def __len__(self):
+        return self.n_entries
+
+    def _score(self, i: int) -> float:
+        return self.key_score[i] if i < self.n_keys else -1.0
+
+    def _argmax(self, l: int, r: int) -> int:
+        """키 구간 [l, r) 에서 점수 최대 키 (동점이면 앞쪽)"""
+        best, best_s = self.n_keys, -1.0
+        l += self.size; r += self.size
+        tree = self.tree
+        while l < r:
+            if l & 1:
+                c = tree[l]; l += 1
+                s = self._score(c)
+                if s > best_s or (s == best_s and c < best):
+                    best, best_s = c, s
+            if r & 1:
+                r -= 1; c = tree[r]
+                s = self._score(c)
+                if s > best_s or (s == best_s and c < best):
+                    best, best_s = c, s
+            l >>= 1; r >>= 1
+        return best
+
+    def prefix_range(self, key: bytes) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, key + b"\xff", lo)  # utf-8 에는 0xff 바이트가 없음
+        return lo, hi
+
+    def entry(self, eid: int) -> dict:
+        kind = self.entry_kind[eid]
+        return {
+            "text": self.entries[eid].decode("utf-8"),
+            "type": "paper" if kind & KIND_PAPER else "dataset" if kind & KIND_DATASET else "keyword",
+            "score": round(float(self.entry_weight[eid]), 4),
+        }
+
+    def _matches(self, eid: int, full: bytes) -> bool:
+        """항목의 (키를 만든) 단어 시작 위치 중 하나가 잘리지 않은 질의 전체로 시작하는지"""
+        # 자모 분해는 글자 단위 → 공백 뒤 위치가 그대로 단어 시작 (한 번만 분해해 바이트 단위로 비교)
+        text = to_jamo(normalize(self.entries[eid].decode("utf-8"))).encode("utf-8")
+        if full not in text:
+            return False
+        starts = [0] + [m.end() for m in re.finditer(b" ", text)]
+        return any(text.startswith(full, pos) for pos in starts[:MAX_WORD_STARTS])
+
+    def _ranked(self, lo: int, hi: int):
+        """키 구간 [lo, hi) 의 항목 id 를 점수 순으로 (같은 항목의 여러 키는 1번만)"""
+        if lo >= hi:
+            return
+        # 구간 argmax 를 꺼내고 좌/우 부분 구간을 다시 힙에 넣는 방식
+        i = self._argmax(lo, hi)
+        heap = [(-self._score(i), i, lo, hi)]
+        seen = set()
+        while heap:
+            _, i, l, r = heapq.heappop(heap)
+            eid = self.key_entry[i]
+            if eid not in seen:
+                seen.add(eid)
+                yield eid
+            for a, b in ((l, i), (i + 1, r)):
+                if a < b:
+                    j = self._argmax(a, b)
+                    heapq.heappush(heap, (-self._score(j), j, a, b))
+
+    def suggest(self, prefix: str, k: int = 10) -> List[dict]:
+        norm = query_norm(prefix)
+        full = to_jamo(norm).encode("utf-8")
+        if len(full) == 0:
+            return []
+        # 제목 맨 앞 키는 잘리지 않음 → 질의 전체로 찾은 구간은 모두 일치
+        out = list(itertools.islice(self._ranked(*self.prefix_range(full)), k))
+        if len(norm) > MAX_KEY_CHARS and len(out) < k:
+            # 단어 중간 키는 MAX_KEY_CHARS 글자로 잘려 있음 → 잘린 질의로 구간을 찾고
+            # 점수 순 상위 MAX_LONG_CANDIDATES 개 항목만 전체 문자열로 다시 거름 (구간이 커도 비용 상한 고정)
+            found = set(out)
+            key = to_jamo(norm[:MAX_KEY_CHARS]).encode("utf-8")
+            cands = itertools.islice((e for e in self._ranked(*self.prefix_range(key)) if e not in found),
+                                     MAX_LONG_CANDIDATES)
+            out += itertools.islice((e for e in cands if self._matches(e, full)), k - len(out))
+        return [self.entry(eid) for eid in out]
+
+    def close(self):
+        for v in self._views:
+            v.release()
+        self._mm.close()
+
+
+# -------------------- CLI --------------------
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers",   default="papers_clean.prep.csv")
+    ap.add_argument("--datasets", default="datasets_clean_prep.csv")
+    ap.add_argument("--out",      default=SUGGEST_FILE)
+    ap.add_argument("--build",    action="store_true")
+    ap.add_argument("--query",    default=None)
+    ap.add_argument("--k",        type=int, default=10)
+    args = ap.parse_args()
+
+    if args.build:
+        t0 = time.perf_counter()
+        n = build_suggest_index([("paper", load_df(args.papers)), ("dataset", load_df(args.datasets))], args.out)
+        print(f"[OK] suggest index: {n} entries → {args.out} "
+              f"({os.path.getsize(args.out) / 1e6:.1f} MB, {time.perf_counter() - t0:.1f}s)")
+    if args.query is not None:
+        idx = SuggestIndex(args.out)
+        t0 = time.perf_counter()
+        res = idx.suggest(args.query, args.k)
+        dt = (time.perf_counter() - t0) * 1000
+        for r in res:
+            print(f"  {r['score']:>7.3f}  [{r['type']}] {r['text']}")
+        print(f"[{len(res)} results, {dt:.3f}ms]")
+
+if __name__ == "__main__":
+    main()
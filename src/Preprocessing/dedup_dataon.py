@@ -0,0 +1,243 @@
+# ================================================================
+#  DataON 근사 중복(near-duplicate) 클러스터링 스크립트
+# ------------------------------------------------
+# 역할:
+# - preprocess.py 출력(dataon_clean.jsonl.zst) 을 스트리밍으로 순회 (파트 여러 개 / 평문 jsonl 도 가능)
+# - title + description 을 문자 k-gram(shingle)으로 나눈 뒤 MinHash 서명 계산
+# - LSH(band) 버킷으로 후보 대표 레코드를 찾고, 서명 유사도로 최종 판정
+# - 레코드별 cluster_id(= 대표 레코드 id)와 url 을 dataon_dedup_map.jsonl 로 저장
+#   → pipeline.load_df 가 이 파일이 있으면 비대표 레코드(url 기준)를 인덱스에서 제외
+# - (옵션) 대표 레코드만 모은 dataon_dedup_reps.jsonl 저장
+#
+# svc_id 기준 중복 제거(harvest_dataon.py)와 title 완전일치 제거(노트북)로는
+# 버전만 다른 데이터셋, 기관만 다른 동일 설명 등이 그대로 남아
+# 인덱스 크기·CE 재랭킹 슬롯·Top-K 목록을 잠식하므로 별도 단계로 분리함.
+# ================================================================
+
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import orjson
+from tqdm import tqdm
+
+from jsonl_store import expand, iter_part
+
+# ------------------------------------------------
+# 입력 / 출력 파일 설정
+# ------------------------------------------------
+# preprocess.py 와 같은 위치에서 실행 ('x.jsonl' 패턴은 x.jsonl.zst 도 포함)
+INPUT_PATTERN = "dataon_clean.jsonl"
+MAP_FILE = "dataon_dedup_map.jsonl"
+REPS_FILE = "dataon_dedup_reps.jsonl"
+
+# ------------------------------------------------
+# MinHash / LSH 파라미터
+# ------------------------------------------------
+SHINGLE_SIZE = 5      # 문자 k-gram 길이 (한/영 혼합 텍스트에 단어 단위보다 안정적)
+MAX_CHARS = 1000      # 긴 설명은 앞부분만 사용 (버전 차이는 대부분 앞부분에 드러남)
+NUM_PERM = 64         # MinHash 해시 함수 개수
+BANDS = 8             # LSH band 수 (rows = NUM_PERM // BANDS)
+THRESHOLD = 0.8       # 서명 일치율(추정 Jaccard) 기준 중복 판정 임계값
+SEED = 42
+
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+_SHIFT = np.uint64(32)
+_BASE = np.uint64(1_000_003)  # shingle 다항식 해시 기수
+_rx_space = re.compile(r"\s+")
+_rx_punct = re.compile(r"[^\w\s]")
+
+
+# ================================================================
+# normalize_text() / shingle_hashes()
+# ------------------------------------------------
+# - 소문자화, 구두점 제거, 공백 정규화 후 문자 k-gram(shingle) 집합 생성
+# - 버전 표기(v1.0 → v2.0)나 기관명 차이는 소수의 shingle만 바꾸므로
+#   Jaccard 유사도가 높게 유지됨
+# - 문자열 k-gram을 직접 만들지 않고, 코드포인트 배열 위에서
+#   다항식 해시를 벡터 연산으로 계산 (레코드당 파이썬 루프 제거)
+# ================================================================
+def normalize_text(text):
+    text = _rx_punct.sub(" ", (text or "").lower())
+    return _rx_space.sub(" ", text).strip()
+
+
+def shingle_hashes(text, k=SHINGLE_SIZE):
+    text = normalize_text(text)[:MAX_CHARS]
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) <= k:
+        k = len(codes)
+    n = len(codes) - k + 1
+    h = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        h = h * _BASE + codes[j:j + n]
+    return np.unique(h)
+
+
+# ================================================================
+# MinHasher
+# ------------------------------------------------
+# h_i(x) = ((a_i * x + b_i) mod 2^64) >> 32 형태의 multiply-shift hash 를 NUM_PERM개 사용
+# uint64 곱셈 오버플로(wrap-around)를 그대로 이용해 나머지 연산 없이 계산
+# ================================================================
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        h = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> _SHIFT
+        return h.min(axis=1).astype(np.uint32)
+
+
+# ================================================================
+# LSHClusterer
+# ------------------------------------------------
+# 스트리밍 star-clustering:
+# - 대표(rep) 레코드만 band 버킷에 등록 → 메모리는 대표 수에 비례
+# - 새 레코드는 같은 버킷에 걸린 대표들 중 서명 일치율이 가장 높은 대표에 합류
+# - 임계값을 넘는 대표가 없으면 스스로 새 클러스터의 대표가 됨
+# ================================================================
+class LSHClusterer:
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.buckets = [dict() for _ in range(bands)]  # band key → 대표 번호 리스트
+        self.rep_ids = []                              # 대표 번호 → 레코드 id
+        self.rep_sigs = np.empty((1024, num_perm), dtype=np.uint32)  # 대표 번호 → MinHash 서명
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def assign(self, rec_id, text):
+        """레코드를 클러스터에 배정하고 (cluster_id, is_rep) 반환"""
+        hashes = shingle_hashes(text)
+        if not len(hashes):
+            # title/description 이 비면 서명이 전부 같아지므로 비교하지 않고 단독 클러스터로 둠
+            # (버킷에도 등록하지 않음 → 서로 무관한 빈 레코드끼리 병합되지 않음)
+            return rec_id, True
+        sig = self.hasher.signature(hashes)
+        keys = self._band_keys(sig)
+
+        cands = set()
+        for band, key in zip(self.buckets, keys):
+            cands.update(band.get(key, ()))
+
+        if cands:
+            idx = np.fromiter(cands, dtype=np.int64, count=len(cands))
+            sims = (self.rep_sigs[idx] == sig).mean(axis=1)
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                return self.rep_ids[idx[best]], False
+
+        rep = len(self.rep_ids)
+        if rep == len(self.rep_sigs):
+            self.rep_sigs = np.resize(self.rep_sigs, (2 * rep, self.rep_sigs.shape[1]))
+        self.rep_ids.append(rec_id)
+        self.rep_sigs[rep] = sig
+        for band, key in zip(self.buckets, keys):
+            band.setdefault(key, []).append(rep)
+        return rec_id, True
+
+
+# ================================================================
+# iter_records() / load_cluster_map()
+# ------------------------------------------------
+# - 파트 파일을 한 줄씩 읽어 (record dict) 를 흘려보냄 (전체 적재 X)
+#   (zst 파트는 프레임 단위 해제, 평문 jsonl 도 그대로 지원)
+# - 저장된 매핑 파일을 {id: cluster_id} 로 다시 읽어오는 헬퍼
+# ================================================================
+def iter_records(files):
+    for file in files:
+        yield from tqdm(iter_part(file), desc=os.path.basename(file))
+
+
+def load_cluster_map(path=MAP_FILE):
+    cluster_of = {}
+    with open(path, "rb") as f:
+        for line in f:
+            obj = orjson.loads(line)
+            cluster_of[obj["id"]] = obj["cluster_id"]
+    return cluster_of
+
+
+# ================================================================
+# main()
+# ------------------------------------------------
+# 1️⃣ 파트 파일 스트리밍
+# 2️⃣ MinHash + LSH 로 클러스터 배정
+# 3️⃣ id → cluster_id 매핑 저장 (+ 옵션: 대표 레코드 저장)
+# 4️⃣ 처리량 / 인덱스 크기 감소율 출력
+# ================================================================
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=INPUT_PATTERN)
+    ap.add_argument("--map-out", default=MAP_FILE)
+    ap.add_argument("--reps-out", default=None, help=f"대표 레코드 저장 경로 (예: {REPS_FILE})")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = ap.parse_args()
+
+    files = expand(args.input)
+    if not files:
+        print(f"[SKIP] 입력 파일 없음: {args.input}")
+        return
+
+    clusterer = LSHClusterer(threshold=args.threshold)
+    total, reps = 0, 0
+    t0 = time.perf_counter()
+
+    reps_f = open(args.reps_out, "wb") if args.reps_out else None
+    try:
+        with open(args.map_out, "wb") as map_f:
+            for obj in iter_records(files):
+                rec_id = obj.get("id")
+                if rec_id is None:
+                    continue
+                text = f"{obj.get('title') or ''} {obj.get('description') or ''}"
+                cluster_id, is_rep = clusterer.assign(rec_id, text)
+
+                map_f.write(orjson.dumps(
+                    {"id": rec_id, "cluster_id": cluster_id, "rep": is_rep, "url": obj.get("url") or ""},
+                    option=orjson.OPT_APPEND_NEWLINE,
+                ))
+                if is_rep:
+                    reps += 1
+                    if reps_f:
+                        obj["cluster_id"] = cluster_id
+                        reps_f.write(orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE))
+                total += 1
+    finally:
+        if reps_f:
+            reps_f.close()
+
+    # ================================================================
+    # 처리 완료 로그 (처리량 / 감소율)
+    # ================================================================
+    elapsed = max(1e-9, time.perf_counter() - t0)
+    removed = total - reps
+    print(f"\n[완료] {total}개 레코드 → {reps}개 클러스터 (근사 중복 {removed}개)")
+    print(f"[INFO] 인덱스 크기 감소율: {removed / max(1, total):.1%}")
+    print(f"[INFO] 처리량: {total / elapsed:,.0f} records/s ({elapsed:.1f}s)")
+    print(f"[INFO] 매핑 저장 → {args.map_out}")
+    if args.reps_out:
+        print(f"[INFO] 대표 레코드 저장 → {args.reps_out}")
+
+
+# ================================================================
+# 실행 진입점
+# ================================================================
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# ================================================================
+#  zstd 프레임 분할 JSONL 저장소 (수집/정제 파트 파일 공용 reader/writer)
+# ------------------------------------------------
+# 역할:
+# - 레코드를 JSONL 한 줄씩 모아 FRAME_BYTES 단위의 "독립" zstd 프레임으로 압축해 append
+#   → 파트 파일(*.jsonl.zst) 전체를 `zstd -d` 로 풀면 기존 JSONL 과 동일
+# - 파트마다 작은 인덱스 파일(*.jsonl.zst.idx) 유지
+#     frames : [압축 오프셋, 압축 크기, 원본 크기, 레코드 수]
+#     ids    : 레코드 id (파일 내 순서)
+#     offsets: 레코드별 (자기 프레임을 푼 바이트 안에서의) 시작 오프셋
+#   → load_ids() 는 레코드를 하나도 파싱하지 않고 id 만 읽음 (harvest 재시작용)
+#   → read_record() 는 프레임 하나만 풀어 임의 레코드 접근
+# - iter_records() 는 프레임 묶음 단위로 여러 프로세스에서 병렬 해제·파싱
+#   (fn 을 주면 레코드 가공까지 워커에서 수행, 출력 순서는 입력 순서 유지)
+# - 기존 평문 *.jsonl 도 같은 함수로 읽을 수 있음 (convert 로 일괄 변환)
+#
+# 쓰기 순서는 "프레임 append → 인덱스 교체(os.replace)" 이므로, 중단되더라도
+# 인덱스에 없는 꼬리 바이트는 다음 open 때 잘라내 인덱스와 파일이 항상 일치함.
+# (인덱스 파일 자체가 없으면 잘라내지 않고 PartWriter 가 에러를 냄)
+# ================================================================
+
+import argparse
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import orjson
+import zstandard
+
+# ------------------------------------------------
+# 파라미터
+# ------------------------------------------------
+ZSTD_LEVEL = 10                 # 수집 속도는 API 가 병목이라 압축률 쪽으로 설정
+FRAME_BYTES = 4 << 20           # 프레임 하나의 원본 크기 상한 (임의 접근 시 풀어야 하는 양)
+TASK_BYTES = 32 << 20           # 병렬 읽기 작업 하나에 묶는 원본 크기
+SUFFIX = ".zst"
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def expand(pattern):
+    """
+    glob 패턴(또는 경로 리스트) → 파트 파일 목록
+    - 'x.jsonl' 패턴은 'x.jsonl.zst' 도 포함, 같은 파트가 둘 다 있으면 zst 만 사용
+    - 인덱스/임시 파일은 제외
+    """
+    if isinstance(pattern, (list, tuple)):
+        return list(pattern)
+    files = set(glob.glob(pattern))
+    if not pattern.endswith(SUFFIX):
+        files |= set(glob.glob(pattern + SUFFIX))
+    files = {p for p in files if not p.endswith((INDEX_SUFFIX, ".tmp"))}
+    return sorted(p for p in files if p + SUFFIX not in files)
+
+
+# ================================================================
+# PartWriter
+# ------------------------------------------------
+# - write(records) 로 받은 레코드를 버퍼링하다 FRAME_BYTES 를 넘으면 프레임 하나로 flush
+# - 기존 파트 파일이 있으면 인덱스를 이어받아 append (인덱스 밖 꼬리는 truncate)
+# - 내용이 있는 파트 파일에 인덱스가 없으면 덮어쓰지 않고 에러 (잘라내면 데이터 유실)
+# - 반대로 인덱스만 있고 파트 파일이 없거나 짧아도 에러 (truncate 가 0 으로 채운 프레임을 만듦)
+# - with 문 / close() 로 남은 버퍼까지 기록
+# ================================================================
+class PartWriter:
+    def __init__(self, path, level=ZSTD_LEVEL, frame_bytes=FRAME_BYTES):
+        self.path = path
+        self.frame_bytes = frame_bytes
+        self._cctx = zstandard.ZstdCompressor(level=level)
+        if os.path.exists(index_path(path)):
+            self.index = load_index(path)
+        elif os.path.exists(path) and os.path.getsize(path) > 0:
+            raise FileExistsError(f"인덱스 없는 파트 파일: {path} (zstd -d 로 풀어 convert 로 다시 만들거나 옮긴 뒤 재실행)")
+        else:
+            self.index = _empty_index()
+        last = self.index["frames"][-1] if self.index["frames"] else (0, 0)
+        end = last[0] + last[1]
+        size = os.path.getsize(path) if os.path.exists(path) else None
+        if end and size is None:
+            raise FileNotFoundError(f"인덱스만 있고 파트 파일 없음: {path} (파일을 되돌리거나 {index_path(path)} 삭제 후 재실행)")
+        if end and size < end:
+            raise ValueError(f"파트 파일이 인덱스보다 짧음: {path} ({size} < {end} bytes, 이어 쓰면 0 으로 채워짐)")
+        self._f = open(path, "wb" if size is None else "r+b")
+        self._f.truncate(end)
+        self._f.seek(end)
+        self._buf, self._ids, self._offsets, self._size = [], [], [], 0
+
+    def __len__(self):
+        return len(self.index["ids"]) + len(self._ids)
+
+    def write(self, records):
+        for rec in records:
+            line = orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE)
+            self._buf.append(line)
+            self._ids.append(rec.get("id"))
+            self._offsets.append(self._size)
+            self._size += len(line)
+            if self._size >= self.frame_bytes:
+                self.flush()
+
+    def flush(self):
+        if not self._buf:
+            return
+        raw = b"".join(self._buf)
+        comp = self._cctx.compress(raw)
+        offset = self._f.tell()
+        self._f.write(comp)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+        self.index["frames"].append([offset, len(comp), len(raw), len(self._buf)])
+        self.index["ids"].extend(self._ids)
+        self.index["offsets"].extend(self._offsets)
+        tmp = index_path(self.path) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(self.index))
+        os.replace(tmp, index_path(self.path))
+        self._buf, self._ids, self._offsets, self._size = [], [], [], 0
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _empty_index():
+    return {"version": INDEX_VERSION, "frames": [], "ids": [], "offsets": []}
+
+
+# ================================================================
+# 인덱스 / id 로드
+# ================================================================
+def load_index(path):
+    with open(index_path(path), "rb") as f:
+        index = orjson.loads(f.read())
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"지원하지 않는 인덱스 버전: {index_path(path)}")
+    return index
+
+
+def load_ids(pattern):
+    """파트 파일들의 레코드 id 집합. zst 파트는 인덱스만, 평문 jsonl 은 전체 파싱."""
+    ids = set()
+    for path in expand(pattern):
+        if path.endswith(SUFFIX):
+            ids.update(i for i in load_index(path)["ids"] if i is not None)
+            continue
+        for rec in _iter_plain(path):
+            if "id" in rec:
+                ids.add(rec["id"])
+    return ids
+
+
+# ================================================================
+# 단일 파트 읽기
+# ================================================================
+def _parse_lines(raw):
+    out = []
+    for line in raw.splitlines():
+        try:
+            out.append(orjson.loads(line))
+        except Exception:
+            continue
+    return out
+
+
+def _iter_plain(path):
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield orjson.loads(line)
+            except Exception:
+                continue
+
+
+def _read_frames(path, frames):
+    dctx = zstandard.ZstdDecompressor()
+    with open(path, "rb") as f:
+        for offset, csize, usize, _ in frames:
+            f.seek(offset)
+            yield dctx.decompress(f.read(csize), max_output_size=usize)
+
+
+def iter_part(path):
+    """파트 하나를 순서대로 (프레임 단위 해제, 전체 적재 X)"""
+    if not path.endswith(SUFFIX):
+        yield from _iter_plain(path)
+        return
+    for raw in _read_frames(path, load_index(path)["frames"]):
+        yield from _parse_lines(raw)
+
+
+def read_record(path, i, index=None):
+    """i 번째 레코드만 (해당 프레임 하나만 해제)"""
+    index = index or load_index(path)
+    start = 0
+    for frame in index["frames"]:
+        if i < start + frame[3]:
+            raw = next(_read_frames(path, [frame]))
+            lo = index["offsets"][i]
+            hi = index["offsets"][i + 1] if i + 1 < start + frame[3] else len(raw)
+            return orjson.loads(raw[lo:hi])
+        start += frame[3]
+    raise IndexError(i)
+
+
+# ================================================================
+# 병렬 읽기
+# ------------------------------------------------
+# - 파트별 프레임을 TASK_BYTES 단위로 묶어 작업 생성 (평문 jsonl 은 파일 하나 = 작업 하나)
+# - 워커: 해제 → 파싱 → (fn) → 리스트 반환 (fn 결과는 None 포함 그대로, 입력 1건 = 출력 1건)
+# - 진행 중 작업은 workers * 2 개로 제한 (소비가 느려도 메모리 폭증 X)
+# ================================================================
+def _tasks(files):
+    for path in files:
+        if not path.endswith(SUFFIX):
+            yield path, None
+            continue
+        group, size = [], 0
+        for frame in load_index(path)["frames"]:
+            group.append(frame)
+            size += frame[2]
+            if size >= TASK_BYTES:
+                yield path, group
+                group, size = [], 0
+        if group:
+            yield path, group
+
+
+def _run_task(path, frames, fn=None):
+    if frames is None:
+        recs = list(_iter_plain(path))
+    else:
+        recs = [r for raw in _read_frames(path, frames) for r in _parse_lines(raw)]
+    if fn is None:
+        return recs
+    return [fn(r) for r in recs]
+
+
+def iter_records(pattern, workers=None, fn=None):
+    files = expand(pattern)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for path, frames in _tasks(files):
+            yield from _run_task(path, frames, fn)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+        for path, frames in _tasks(files):
+            pending.append(ex.submit(_run_task, path, frames, fn))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ================================================================
+# convert(): 기존 평문 파트 → zst 파트 + 인덱스
+# ================================================================
+def convert(src, dst=None, level=ZSTD_LEVEL):
+    dst = dst or src + SUFFIX
+    if os.path.exists(dst) or os.path.exists(index_path(dst)):
+        raise FileExistsError(dst)
+    with PartWriter(dst, level=level) as w:
+        for rec in _iter_plain(src):
+            w.write([rec])
+    return dst
+
+
+def main():
+    ap = argparse.ArgumentParser(description="평문 JSONL 파트를 zstd 프레임 파트로 변환")
+    ap.add_argument("inputs", nargs="+", help="변환할 *.jsonl (glob 가능)")
+    ap.add_argument("--level", type=int, default=ZSTD_LEVEL)
+    ap.add_argument("--remove", action="store_true", help="변환 후 원본 삭제")
+    args = ap.parse_args()
+
+    files = sorted({p for pat in args.inputs for p in glob.glob(pat) if not p.endswith(SUFFIX)})
+    for src in files:
+        t0 = time.perf_counter()
+        dst = convert(src, level=args.level)
+        before, after = os.path.getsize(src), os.path.getsize(dst) + os.path.getsize(index_path(dst))
+        print(f"[OK] {src} → {dst}  {before / 1e6:.1f}MB → {after / 1e6:.1f}MB "
+              f"({after / max(1, before):.1%}, {time.perf_counter() - t0:.1f}s)")
+        if args.remove:
+            os.remove(src)
+
+
+# ================================================================
+# 실행 진입점
+# ================================================================
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import { serve } from "https://deno.land/std@0.168.0/http/server.ts";
+import { loadSearchArtifact, searchArtifact } from "./search_artifact.ts";
 
 // CORS 헤더 설정 - 웹 애플리케이션에서 접근 가능하도록 설정
 const corsHeaders = {
@@ -69,14 +70,19 @@ function calculateBM25Score(paper: any, queryKeywords: string[]): number {
  * AI 모델이 실패하거나 결과를 반환하지 못할 때 사용
  * papers_clean.jsonl 데이터를 활용하거나 기본 추천 제공
  */
-function generateFallbackRecommendations(query: string, papersData: any[] = []): any[] {
+function generateFallbackRecommendations(query: string, papersData: any[] = [], rankedPapers: any[] | null = null): any[] {
   const queryKeywords = query.toLowerCase().split(/\s+/).filter(k => k.length > 1);
   
+  // 검색 아티팩트 결과가 있으면 그 순위를 그대로 사용 (최고 점수 기준 0.70~0.95 로 정규화)
+  const maxArtifactScore = rankedPapers?.[0]?.bm25Score || 1;
+  
   // papers_clean.jsonl 데이터가 있으면 활용
   if (papersData.length > 0) {
-    const scoredPapers = papersData.map(paper => {
+    const scoredPapers = (rankedPapers ?? papersData).map(paper => {
       const bm25Score = calculateBM25Score(paper, queryKeywords);
-      const normalizedScore = Math.min(0.95, 0.70 + (bm25Score * 0.05));
+      const normalizedScore = rankedPapers
+        ? 0.70 + 0.25 * (paper.bm25Score / maxArtifactScore)
+        : Math.min(0.95, 0.70 + (bm25Score * 0.05));
       
       const matchedKeywords = queryKeywords.filter(k => 
         (paper.title || '').toLowerCase().includes(k) || 
@@ -105,7 +111,7 @@ function generateFallbackRecommendations(query: string, papersData: any[] = []):
         matchedKeywords: matchedKeywords,
         matchedFields: matchedFields
       };
-    }).filter(p => calculateBM25Score(p, queryKeywords) > 0)
+    }).filter(p => rankedPapers !== null || calculateBM25Score(p, queryKeywords) > 0)
       .sort((a, b) => b.score - a.score)
       .slice(0, 50);
     
@@ -351,10 +357,11 @@ serve(async (req) => {
       throw new Error("LOVABLE_API_KEY is not configured");
     }
 
-    // 논문 데이터 로드
+    // 논문 데이터 로드 (검색 아티팩트 우선, 없으면 papers_clean.jsonl 전체)
     console.log("Loading papers data...");
-    const papersData = await loadPapersData();
-    console.log(`Loaded ${papersData.length} papers from data file`);
+    const artifact = await loadSearchArtifact();
+    const papersData = artifact ? artifact.docs : await loadPapersData();
+    console.log(`Loaded ${papersData.length} papers from ${artifact ? "search artifact" : "data file"}`);
 
     // Clarify 로직 - 모호한 쿼리인지 확인
     const ambiguity = calculateAmbiguity(query);
@@ -374,6 +381,7 @@ serve(async (req) => {
     // 실제 검색 쿼리 구성 - selectedOption이 있으면 쿼리에 추가
     const searchQuery = selectedOption ? `${selectedOption} ${query}` : query;
     console.log(`Searching for: "${searchQuery}"`);
+    const rankedPapers = artifact ? await searchArtifact(artifact, searchQuery) : null;
 
     // 소규모 LLM을 사용한 추천 시스템 프롬프트
     const systemPrompt = `당신은 연구 논문 추천 AI입니다.
@@ -449,7 +457,7 @@ serve(async (req) => {
     if (!response.ok) {
       if (response.status === 429) {
         console.log("Rate limit exceeded, using fallback");
-        const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData);
+        const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData, rankedPapers);
         return new Response(
           JSON.stringify({ 
             recommendations: fallbackRecs.map((rec, index) => ({
@@ -472,7 +480,7 @@ serve(async (req) => {
       }
       if (response.status === 402) {
         console.log("Payment required, using fallback");
-        const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData);
+        const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData, rankedPapers);
         return new Response(
           JSON.stringify({ 
             recommendations: fallbackRecs.map((rec, index) => ({
@@ -539,12 +547,12 @@ serve(async (req) => {
     // AI가 10개 미만을 생성하면 fallback으로 50개 채우기
     if (!recommendations || recommendations.length < 10) {
       console.log("AI did not generate enough recommendations, using fallback");
-      const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData);
+      const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData, rankedPapers);
       // AI 추천이 있으면 앞에 추가
       recommendations = [...recommendations, ...fallbackRecs].slice(0, 50);
     } else {
       // AI가 10개를 생성했으면 fallback으로 40개 더 채워서 50개 만들기
-      const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData);
+      const fallbackRecs = generateFallbackRecommendations(searchQuery, papersData, rankedPapers);
       recommendations = [...recommendations, ...fallbackRecs].slice(0, 50);
     }
 
@@ -0,0 +1,148 @@
+/**
+ * 사전 구축 검색 아티팩트 (scripts/data_prep/build_search_artifact.py 산출물)
+ * - manifest.json + docs.json.gz 는 최초 1회만 로드하고, 샤드는 질의 term 이 속한 것만 받아
+ *   모듈 전역에 보관 → warm invocation 에서는 네트워크/파싱 없이 바로 검색
+ * - 로드 실패 시 null → 기존 papers_clean.jsonl 경로로 대체
+ * - search_artifact_test.ts 가 Python 쪽 점수(check_search_artifact.py --golden)와 비교
+ */
+export const SEARCH_ARTIFACT_BASE = Deno.env.get("SEARCH_ARTIFACT_BASE") ??
+  'https://rwfhztuxgqyphqvjontp.supabase.co/storage/v1/object/public/papers/search';
+
+export interface SearchShard {
+  terms: Map<string, number>;
+  postOff: Uint32Array;
+  scale: Float32Array;
+  docIds: Uint32Array;
+  impacts: Uint8Array;
+}
+
+export interface SearchArtifact {
+  base: string;
+  manifest: any;
+  docs: any[];  // { title, description, url }
+  shards: Map<number, Promise<SearchShard>>;
+}
+
+let searchArtifactPromise: Promise<SearchArtifact | null> | null = null;
+
+async function fetchGzip(base: string, name: string): Promise<ArrayBuffer> {
+  const response = await fetch(`${base}/${name}`);
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to load ${name}: ${response.status}`);
+  }
+  return await new Response(response.body.pipeThrough(new DecompressionStream("gzip"))).arrayBuffer();
+}
+
+export function fnv1a(term: string): number {
+  let h = 0x811c9dc5;
+  for (const b of new TextEncoder().encode(term)) {
+    h = Math.imul(h ^ b, 0x01000193) >>> 0;
+  }
+  return h;
+}
+
+// pipeline.lite_tokens 와 동일: [가-힣A-Za-z0-9]+ , 소문자, 길이 2 이상
+export function liteTokens(text: string): string[] {
+  return (text.match(/[가-힣A-Za-z0-9]+/g) || []).map(t => t.toLowerCase()).filter(t => t.length > 1);
+}
+
+export function parseShard(buf: ArrayBuffer): SearchShard {
+  const view = new DataView(buf);
+  const magic = new TextDecoder().decode(new Uint8Array(buf, 0, 4));
+  if (magic !== "RGS1") throw new Error("bad shard magic");
+  const nTerms = view.getUint32(4, true);
+  const nPost = view.getUint32(8, true);
+  let o = 12;
+  const u32 = (n: number) => {
+    const out = new Uint32Array(n);
+    for (let i = 0; i < n; i++, o += 4) out[i] = view.getUint32(o, true);
+    return out;
+  };
+  const termOff = u32(nTerms + 1);
+  const blob = new Uint8Array(buf, o, termOff[nTerms]);
+  o += termOff[nTerms];
+  const decoder = new TextDecoder();
+  const terms = new Map<string, number>();
+  for (let i = 0; i < nTerms; i++) {
+    terms.set(decoder.decode(blob.subarray(termOff[i], termOff[i + 1])), i);
+  }
+  const postOff = u32(nTerms + 1);
+  const scale = new Float32Array(nTerms);
+  for (let i = 0; i < nTerms; i++, o += 4) scale[i] = view.getFloat32(o, true);
+  const docIds = u32(nPost);
+  const impacts = new Uint8Array(buf.slice(o, o + nPost));
+  return { terms, postOff, scale, docIds, impacts };
+}
+
+export function loadSearchArtifact(base: string = SEARCH_ARTIFACT_BASE): Promise<SearchArtifact | null> {
+  if (!searchArtifactPromise) {
+    searchArtifactPromise = (async () => {
+      try {
+        const manifestRes = await fetch(`${base}/manifest.json`);
+        if (!manifestRes.ok) throw new Error(`manifest ${manifestRes.status}`);
+        const manifest = await manifestRes.json();
+        const docs = JSON.parse(new TextDecoder().decode(await fetchGzip(base, manifest.docs)))
+          .map(([title, description, url]: string[]) => ({ title, description, url }));
+        console.log(`Search artifact ${manifest.version}: ${manifest.n_docs} docs, ${manifest.n_shards} shards`);
+        return { base, manifest, docs, shards: new Map() };
+      } catch (e) {
+        console.error("Search artifact unavailable, using papers_clean.jsonl:", e);
+        searchArtifactPromise = null;  // 다음 요청에서 재시도
+        return null;
+      }
+    })();
+  }
+  return searchArtifactPromise;
+}
+
+function getShard(artifact: SearchArtifact, s: number): Promise<SearchShard> {
+  let shard = artifact.shards.get(s);
+  if (!shard) {
+    shard = fetchGzip(artifact.base, artifact.manifest.shards[s]).then(parseShard);
+    shard.catch(() => artifact.shards.delete(s));
+    artifact.shards.set(s, shard);
+  }
+  return shard;
+}
+
+/**
+ * 아티팩트 점수: Σ_term (impact * scale) ≈ WeightedBM25 점수 (필드 가중 포함)
+ * 상위 k 개 [doc id, 점수] (점수 내림차순, 동점이면 doc id 오름차순). 샤드 로드 실패 시 reject
+ */
+export async function scoreArtifact(artifact: SearchArtifact, query: string, k = 50): Promise<[number, number][]> {
+  const tokens = liteTokens(query);
+  const nShards = artifact.manifest.n_shards;
+  const shards = await Promise.all(tokens.map(t => getShard(artifact, fnv1a(t) % nShards)));
+
+  const scores = new Map<number, number>();
+  tokens.forEach((t, j) => {
+    const shard = shards[j];
+    const i = shard.terms.get(t);
+    if (i === undefined) return;
+    const scale = shard.scale[i];
+    for (let p = shard.postOff[i]; p < shard.postOff[i + 1]; p++) {
+      const d = shard.docIds[p];
+      scores.set(d, (scores.get(d) || 0) + shard.impacts[p] * scale);
+    }
+  });
+
+  return [...scores.entries()]
+    .filter(([, score]) => score > 0)
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, k);
+}
+
+/**
+ * 아티팩트 검색: 상위 k 개 문서를 { ...doc, bm25Score } 로 반환
+ * 샤드 로드(fetch/gunzip/파싱) 실패 시 null → 호출 측은 docs 전체 스캔 랭킹으로 대체
+ */
+export async function searchArtifact(artifact: SearchArtifact, query: string, k = 50): Promise<any[] | null> {
+  let top: [number, number][];
+  try {
+    top = await scoreArtifact(artifact, query, k);
+  } catch (e) {
+    console.error("Search artifact shard load failed, using full-scan ranking:", e);
+    return null;
+  }
+  return top.map(([d, score]) => ({ ...artifact.docs[d], bm25Score: score }));
+}
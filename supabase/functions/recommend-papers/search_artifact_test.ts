@@ -0,0 +1,60 @@
+/**
+ * search_artifact.ts 검증: 빌드된 아티팩트를 TS 리더로 읽어 질의별 Top-K 가
+ * Python 쪽 결과(scripts/eval/check_search_artifact.py --golden)와 같은지 확인
+ * - doc id 순서 동일 + 점수 상대오차 1e-6 이내 → fnv1a 샤드 배정 / 샤드 파싱 / impact*scale 역양자화 일치
+ * - WeightedBM25 Top-K 와의 overlap 이 Python 리더와 같은 수준인지
+ *
+ * 실행 (golden 이 없으면 건너뜀):
+ *   deno test --allow-read --allow-env supabase/functions/recommend-papers/search_artifact_test.ts
+ *   SEARCH_ARTIFACT_DIR / SEARCH_ARTIFACT_GOLDEN 으로 경로 변경
+ */
+import { assert, assertEquals } from "https://deno.land/std@0.168.0/testing/asserts.ts";
+import { resolve, toFileUrl } from "https://deno.land/std@0.168.0/path/mod.ts";
+import { fnv1a, loadSearchArtifact, scoreArtifact } from "./search_artifact.ts";
+
+const ARTIFACT_DIR = Deno.env.get("SEARCH_ARTIFACT_DIR") ?? "cache/search_artifact";
+const GOLDEN = Deno.env.get("SEARCH_ARTIFACT_GOLDEN") ?? "cache/search_artifact.golden.json";
+
+function exists(path: string): boolean {
+  try {
+    Deno.statSync(path);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+Deno.test("fnv1a matches build_search_artifact.fnv1a", () => {
+  // Python: fnv1a("") / fnv1a("a") / fnv1a("딥러닝")
+  assertEquals(fnv1a(""), 0x811c9dc5);
+  assertEquals(fnv1a("a"), 0xe40c292c);
+  assertEquals(fnv1a("딥러닝"), 0x672c9d76);
+});
+
+Deno.test({
+  name: "TS artifact reader top-k matches Python scores",
+  ignore: !exists(GOLDEN) || !exists(ARTIFACT_DIR),
+  async fn() {
+    const golden = JSON.parse(await Deno.readTextFile(GOLDEN));
+    const artifact = await loadSearchArtifact(toFileUrl(resolve(ARTIFACT_DIR)).href);
+    assert(artifact, `artifact not loadable: ${ARTIFACT_DIR}`);
+    assertEquals(artifact.manifest.version, golden.artifact, "golden was built from a different artifact");
+
+    const overlaps: number[] = [];
+    for (const { query, top, bm25_top } of golden.queries) {
+      const got = await scoreArtifact(artifact, query, golden.k);
+      assertEquals(got.map(([d]) => d), top.map(([d]: number[]) => d), `top-k ids differ for "${query}"`);
+      got.forEach(([, score], i) => {
+        const want = top[i][1];
+        assert(Math.abs(score - want) <= 1e-6 * Math.max(1, Math.abs(want)),
+          `score differs for "${query}" rank ${i}: ${score} vs ${want}`);
+      });
+      if (bm25_top.length) {
+        const ids = new Set(got.map(([d]) => d));
+        overlaps.push(bm25_top.filter((d: number) => ids.has(d)).length / bm25_top.length);
+      }
+    }
+    const overlap = overlaps.reduce((a, b) => a + b, 0) / Math.max(1, overlaps.length);
+    assert(overlap >= golden.min_overlap - 1e-9, `overlap@${golden.k} ${overlap} < ${golden.min_overlap}`);
+  },
+});